@@ -0,0 +1,80 @@
+"""Regression tests for volcano_icons (run: python -m pytest server/)."""
+
+import asyncio
+import tempfile
+
+import pytest
+
+pytest.importorskip("PIL")
+
+from PIL import Image, ImageDraw, ImageFilter
+
+import volcano_icons as vi
+
+
+def _baseline_icon(value: float, size: int, pad: int = 3) -> Image.Image:
+    """The original, unmemoized make_glossy_ball_icon pipeline."""
+    rgb = vi.value_to_rgb(value)
+    clear = (0, 0, 0, 0)
+    img = Image.new("RGBA", (size, size), clear)
+
+    shadow = Image.new("RGBA", (size, size), clear)
+    sd = ImageDraw.Draw(shadow)
+    sd.ellipse((pad + 2, pad + 3, size - pad + 2, size - pad + 3), fill=(0, 0, 0, 70))
+    shadow = shadow.filter(ImageFilter.GaussianBlur(radius=3))
+    img.alpha_composite(shadow)
+
+    ball = Image.new("RGBA", (size, size), clear)
+    d = ImageDraw.Draw(ball)
+    d.ellipse((pad, pad, size - pad, size - pad), fill=(*rgb, 255))
+
+    rim = vi._radial_gradient_python(size, (255, 255, 255, 10), (0, 0, 0, 90), (0.50, 0.55))
+    mask = Image.new("L", (size, size), 0)
+    ImageDraw.Draw(mask).ellipse((pad, pad, size - pad, size - pad), fill=255)
+    rim.putalpha(Image.composite(rim.split()[-1], Image.new("L", (size, size), 0), mask))
+    ball = Image.alpha_composite(ball, Image.composite(rim, Image.new("RGBA", (size, size), clear), mask))
+
+    highlight = vi._radial_gradient_python(size, (255, 255, 255, 140), (255, 255, 255, 0), (0.30, 0.25))
+    clip = Image.new("L", (size, size), 0)
+    ImageDraw.Draw(clip).ellipse((pad + 6, pad + 4, size - pad - 6, size // 2 + 6), fill=255)
+    highlight.putalpha(Image.composite(highlight.split()[-1], Image.new("L", (size, size), 0), clip))
+    ball = Image.alpha_composite(ball, Image.composite(highlight, Image.new("RGBA", (size, size), clear), mask))
+
+    d = ImageDraw.Draw(ball)
+    d.ellipse((pad, pad, size - pad, size - pad), outline=(0, 0, 0, 60), width=1)
+    img.alpha_composite(ball)
+    return img
+
+
+@pytest.mark.parametrize("size", [32, 64])
+def test_memoized_layers_match_baseline(size):
+    for v in range(0, 201):
+        got = vi.make_glossy_ball_icon(v, size=size)
+        assert got.tobytes() == _baseline_icon(v, size).tobytes(), f"value {v}"
+
+
+def test_icon_service_temp_area_stays_bounded(tmp_path, monkeypatch):
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    legacy = tmp_path / "volcano_ball_abc123.png"
+    legacy.write_bytes(b"")
+    # A regular file in the way makes the persistent cache unwritable (even as root)
+    blocker = tmp_path / "blocker"
+    blocker.write_text("")
+
+    svc = vi.IconService(cache_dir=blocker / "icons", temp_root=tmp_path / "icons-tmp", temp_max=8)
+    svc.start()
+    assert not legacy.exists()
+
+    async def notify_many(n):
+        for i in range(n):
+            await svc.path((i * 7) % 201)
+
+    n = 100
+    asyncio.run(notify_many(n))
+    assert svc.stats["temp"] == n
+    assert svc.temp_files() <= svc.temp_max
+    assert svc.stats["evicted"] > 0
+
+    svc.close()
+    assert not svc.temp_dir.exists()
+    assert not svc.temp_root.exists()
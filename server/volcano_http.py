@@ -20,30 +20,48 @@ FAV_TEMP       = '190'
 # ===============          Konfigurierbare Parameter ENDE          ===============
 
 
-import threading
-import requests
 import asyncio
+import collections
+import contextlib
+import heapq
+import itertools
 import argparse
 import traceback
 import time
+import math
 import json
 import os
-import subprocess
 import shutil
-from aiohttp import web
+import tempfile
+from aiohttp import ClientSession, ClientTimeout, TCPConnector, web
 from bleak import BleakClient, BleakScanner
 from bleak.backends.device import BLEDevice
+from bleak.backends.characteristic import BleakGATTCharacteristic
 from datetime import datetime
 from bleak.backends.scanner import AdvertisementData
-from typing import Optional, Dict, List, Tuple
+from dataclasses import dataclass
+from typing import Callable, Optional, Dict, List, Tuple
 
 # ==== Einfaches Error-Log im /tmp ====
 LOG_PATH = "/tmp/volcano_http_error.log"
 
 # Globale Parameter.
 NOTIFY_PATH = shutil.which("notify-send")
-TO_KILL_NOTIFICATION = 1
-WATCH_RUNNING = False
+NOTIFY_APP_NAME = "Volcano http"
+# Aktives Notification-Backend (von main_async gesetzt, None = keine Notifications)
+NOTIFIER = None
+# Dedupe/Rate-Limit vor dem Backend (von main_async gesetzt)
+NOTIFY_GATE = None
+# Queue für Arbeit nach der HTTP-Antwort (von main_async gesetzt)
+SIDE_EFFECTS = None
+# Interner Event-Bus mit Sinks (von main_async gesetzt)
+EVENTS = None
+# /events-Verteiler (SseSink, von main_async gesetzt)
+SSE = None
+# Icon-Quelle für Notifications (volcano_icons.IconService, von main_async gesetzt)
+ICONS = None
+# Läuft gerade eine Aufheiz-Fortschrittsanzeige? (max. eine)
+HEAT_FOLLOWER: Optional[asyncio.Task] = None
 TEMP_INDEX = 0
 DEFAULT_TEMP = FAV_TEMP
 FAN_STATE = 'Pumpen              : AUS'
@@ -66,6 +84,97 @@ def log_error(msg: str, exc: Optional[BaseException] = None) -> None:
         # Logging soll nie selbst einen Crash verursachen
         pass
 
+# ==== Persistenter Zustand (überlebt Neustarts) ====
+STATE_FILE = os.path.join(
+    os.environ.get("XDG_STATE_HOME", os.path.expanduser("~/.local/state")),
+    "volcano",
+    "volcano_http.json",
+)
+_PERSISTED: Dict = {}
+
+
+def load_persisted(path: str = STATE_FILE) -> Dict:
+    """Liest den zuletzt gespeicherten Zustand; bei Fehlern leeres Dict."""
+    global _PERSISTED
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            d = json.load(f)
+        _PERSISTED = d if isinstance(d, dict) else {}
+    except FileNotFoundError:
+        _PERSISTED = {}
+    except Exception as e:
+        log_error(f"Zustandsdatei {path} unlesbar – ignoriere", e)
+        _PERSISTED = {}
+    return dict(_PERSISTED)
+
+
+def save_persisted(d: Dict, path: str = STATE_FILE) -> None:
+    """Schreibt den Zustand atomar (Temp-Datei + rename), nur bei Änderung."""
+    global _PERSISTED
+    if d == _PERSISTED:
+        return
+    try:
+        folder = os.path.dirname(path)
+        os.makedirs(folder, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(prefix=".volcano_http_", suffix=".tmp", dir=folder)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(d, f, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, path)
+        except BaseException:
+            with contextlib.suppress(OSError):
+                os.unlink(tmp)
+            raise
+        _PERSISTED = dict(d)
+    except Exception as e:
+        log_error(f"Zustandsdatei {path} nicht schreibbar", e)
+
+
+def _state_snapshot(v: "VolcanoBLE") -> Dict:
+    return {
+        "addr": v._last_addr,
+        "adapter": v.adapter,
+        "temp_index": TEMP_INDEX,
+        "default_temp": DEFAULT_TEMP,
+    }
+
+
+# Saves aus dem Betrieb: entprellt und im Executor (kein fsync im Event-Loop)
+PERSIST_DEBOUNCE_S = 2.0
+_persist_pending: Optional[Dict] = None
+_persist_task: Optional[asyncio.Task] = None
+_persist_now: Optional[asyncio.Event] = None
+
+
+def schedule_persist(v: "VolcanoBLE") -> None:
+    """Aktuellen Zustand merken; geschrieben wird nach PERSIST_DEBOUNCE_S."""
+    global _persist_pending, _persist_task, _persist_now
+    _persist_pending = _state_snapshot(v)
+    if _persist_task is None or _persist_task.done():
+        _persist_now = asyncio.Event()
+        _persist_task = asyncio.create_task(_persist_worker(), name="volcano-persist")
+
+
+async def _persist_worker() -> None:
+    global _persist_pending
+    with contextlib.suppress(asyncio.TimeoutError):
+        await asyncio.wait_for(_persist_now.wait(), PERSIST_DEBOUNCE_S)
+    loop = asyncio.get_running_loop()
+    # Was während eines Writes dazukommt, wird im selben Task nachgeschrieben
+    while _persist_pending is not None:
+        d, _persist_pending = _persist_pending, None
+        await loop.run_in_executor(None, save_persisted, d)
+
+
+async def flush_persist(v: "VolcanoBLE") -> None:
+    """Beim Shutdown: aktuellen Zustand sofort (im Executor) schreiben."""
+    schedule_persist(v)
+    _persist_now.set()
+    await _persist_task
+
+
 # ==== Bekannte UUIDs ====
 SERVICE_UUID      = "10110000-5354-4f52-5a26-4249434b454c"
 CHAR_CURRENT_TEMP = "10110001-5354-4f52-5a26-4249434b454c"
@@ -87,6 +196,13 @@ SETTINGS_CANDIDATES = [
     "101300ff-5354-4f52-5a26-4249434b454c",  # möglicher blob
 ]
 
+# Alle bekannten Characteristics – werden pro Verbindung einmal aufgelöst.
+KNOWN_CHARS = (
+    CHAR_CURRENT_TEMP, CHAR_TARGET_TEMP, CHAR_HEAT_ON, CHAR_HEAT_OFF,
+    CHAR_FAN_ON, CHAR_FAN_OFF, ALT_CHAR_FAN_ON, ALT_CHAR_FAN_OFF,
+    *SETTINGS_CANDIDATES,
+)
+
 
 def _u16le_to_c(v: bytes) -> Optional[float]:
     return int.from_bytes(v[:2], "little") / 10.0 if len(v) >= 2 else None
@@ -97,6 +213,76 @@ def _hex(b: bytes, maxlen: int = 64) -> str:
     h = b.hex()
     return h if len(h) <= maxlen else (h[:maxlen] + "…")
 
+# ==== Scan ====
+# Mindest-RSSI, ab dem ein Volcano-Treffer den Scan sofort beendet.
+SCAN_MIN_RSSI = -90
+
+# Advertisement-Index: Einträge verfallen nach ADV_TTL_S Sekunden ohne neues
+# Advertisement. RSSI wird exponentiell geglättet (Gewicht neuer Werte).
+ADV_TTL_S = 60.0
+ADV_RSSI_ALPHA = 0.3
+# So lange nach dem Start gilt ein leerer Index als "noch nicht warm".
+ADV_WARMUP_S = 3.0
+# Mindestabstand (Sekunden) zwischen zwei Advertisement-getriggerten
+# Connect-Versuchen, falls der Connect fehlschlägt.
+ADV_RECONNECT_MIN_S = 2.0
+
+
+# ==== Verbindungs-Zustandsmaschine ====
+CONN_DISCONNECTED = "disconnected"
+CONN_SCANNING     = "scanning"
+CONN_CONNECTING   = "connecting"
+CONN_CONNECTED    = "connected"
+CONN_BACKOFF      = "backing-off"
+
+# Exponentielles Backoff nach fehlgeschlagenen Connects
+BACKOFF_BASE_S = 2.0
+BACKOFF_MAX_S  = 60.0
+# Ab so vielen Fehlversuchen in Folge ist der Breaker offen:
+# Anfragen scheitern sofort (HTTP 503 + retry_after) statt zu scannen.
+BREAKER_THRESHOLD = 2
+
+
+class DeviceUnavailable(RuntimeError):
+    """Gerät derzeit nicht erreichbar; retry_after in Sekunden."""
+
+    def __init__(self, msg: str, retry_after: float):
+        super().__init__(msg)
+        self.retry_after = retry_after
+
+
+# ==== Zustands-Cache (Notify-gespeist) ====
+# Characteristics, die nach dem Connect per Notify abonniert und im Speicher
+# gespiegelt werden. /status, send_notify und watch lesen von hier.
+STATE_CHARS = (CHAR_CURRENT_TEMP, CHAR_TARGET_TEMP)
+
+# Max. Alter (Sekunden) eines gecachten Wertes, wenn KEIN Notify-Abo läuft.
+# Mit Abo bleibt der Wert gültig, solange die Verbindung steht.
+STATE_MAX_AGE = 30.0
+
+# Fenster (Sekunden), in dem schnell aufeinanderfolgende Zieltemperaturen
+# zusammengefasst werden – geschrieben wird nur der letzte Wert. 0 = aus.
+TEMP_COALESCE_S = 0.15
+
+# Wartezeit (Sekunden) zwischen zwei Fortschritts-Notifications beim Aufheizen,
+# falls zwischendurch keine Temperatur-Änderung gemeldet wird.
+NOTIFY_FOLLOW_S = 1.0
+
+
+@dataclass
+class CharState:
+    """Letzter bekannter Wert einer Characteristic + Empfangszeitpunkt."""
+    value: Optional[bytes] = None
+    ts: float = 0.0         # time.monotonic() beim Empfang
+    notify: bool = False    # Notify-Abo aktiv?
+    confirmed: bool = False # Wert kam vom Gerät (Notify/Read), nicht optimistisch
+
+    def age(self) -> float:
+        if self.value is None:
+            return float("inf")
+        return time.monotonic() - self.ts
+
+
 def _looks_like_volcano(name: Optional[str], uuids: Optional[List[str]]) -> bool:
     n = (name or "").lower()
     if any(x in n for x in ("volcano", "storz", "bickel", "s&b")):
@@ -106,6 +292,350 @@ def _looks_like_volcano(name: Optional[str], uuids: Optional[List[str]]) -> bool
             return True
     return False
 
+# ==== Write-Modus-Gedächtnis ====
+# Fast-Path: Writes auf Characteristics mit Zustands-Cache ohne Response
+# schreiben und danach per Notify (oder verzögertem Read) bestätigen.
+FAST_WRITES = False
+# Wartezeit (Sekunden) auf das bestätigende Notify, danach Read.
+FAST_CONFIRM_S = 0.5
+# Erst nach so vielen Fehlschlägen in Folge mit Response (bei stehender
+# Verbindung) auf Writes ohne Response zurückfallen ...
+WRITE_DEMOTE_AFTER = 3
+# ... und danach regelmäßig wieder mit Response probieren (Sekunden).
+WRITE_REPROBE_S = 60.0
+
+
+@dataclass
+class WriteModeStats:
+    """Gelernte Write-Modi einer Characteristic (response=True/False).
+
+    Ohne Response wird nur geschrieben, wenn die Characteristic nichts anderes
+    kann (no_ack_only, aus den Properties) oder nach WRITE_DEMOTE_AFTER
+    Fehlschlägen mit Response in Folge; dann alle WRITE_REPROBE_S wieder
+    mit Response. Ein geglückter Write ohne Response beweist nichts und
+    ändert den Modus nicht.
+    """
+    mode: Optional[bool] = None     # None = noch nichts gelernt (-> Response)
+    no_ack_only: bool = False
+    fail_streak: int = 0            # Fehlschläge mit Response in Folge
+    demoted_at: float = 0.0
+    ok_resp: int = 0
+    ok_noresp: int = 0
+    fail_resp: int = 0
+    fail_noresp: int = 0
+    ms_resp: Optional[float] = None     # gleitender Mittelwert
+    ms_noresp: Optional[float] = None
+
+    def preferred(self) -> bool:
+        if self.no_ack_only:
+            return False
+        if self.mode is False and time.monotonic() - self.demoted_at >= WRITE_REPROBE_S:
+            # Re-Probe: vielleicht war es nur ein vorübergehender Fehler
+            return True
+        return True if self.mode is None else self.mode
+
+    def record(self, response: bool, success: bool, ms: float,
+               live: bool = True, learn: bool = True) -> None:
+        """Ergebnis zählen; learn=False/live=False -> Modus bleibt unberührt."""
+        suffix = "resp" if response else "noresp"
+        key = ("ok_" if success else "fail_") + suffix
+        setattr(self, key, getattr(self, key) + 1)
+        if success:
+            prev = getattr(self, "ms_" + suffix)
+            setattr(self, "ms_" + suffix, ms if prev is None else 0.7 * prev + 0.3 * ms)
+        if not learn or not response:
+            return
+        if success:
+            self.fail_streak = 0
+            self.mode = True
+        elif live:
+            self.fail_streak += 1
+            if self.fail_streak >= WRITE_DEMOTE_AFTER:
+                self.mode = False
+                self.demoted_at = time.monotonic()
+
+    def as_dict(self) -> Dict:
+        return {
+            "mode": None if self.mode is None else ("response" if self.mode else "no-response"),
+            "no_ack_only": self.no_ack_only,
+            "fail_streak": self.fail_streak,
+            "ok": {"response": self.ok_resp, "no-response": self.ok_noresp},
+            "fail": {"response": self.fail_resp, "no-response": self.fail_noresp},
+            "avg_ms": {
+                "response": None if self.ms_resp is None else round(self.ms_resp, 1),
+                "no-response": None if self.ms_noresp is None else round(self.ms_noresp, 1),
+            },
+        }
+
+
+# ==== GATT-Scheduler ====
+# Prioritätsklassen (kleiner = wichtiger). Laufende GATT-Operationen werden
+# nicht abgebrochen, aber wartende Nutzer-Befehle überholen Hintergrund-Reads.
+PRIO_USER       = 0   # fan/heat/set_temp – Button-Latenz
+PRIO_NORMAL     = 1   # /status-Fallback, Dev-Tools
+PRIO_BACKGROUND = 2   # Keep-Alive, Settings-Sweep, Notification-Reads
+
+PRIO_NAMES = {PRIO_USER: "user", PRIO_NORMAL: "normal", PRIO_BACKGROUND: "background"}
+
+# Max. Anzahl wartender Jobs je Klasse; darüber wird sofort abgewiesen.
+GATT_QUEUE_LIMITS = {PRIO_USER: 8, PRIO_NORMAL: 16, PRIO_BACKGROUND: 4}
+
+
+class GattQueueFull(RuntimeError):
+    """Warteschlange einer Prioritätsklasse ist voll."""
+
+
+class GattScheduler:
+    """Prioritäts-Lock für GATT-Operationen (ersetzt das einfache asyncio.Lock).
+
+    Immer genau ein Job hält den Slot. Beim Freigeben bekommt der wartende Job
+    mit der höchsten Priorität (bei Gleichstand: der älteste) den Slot direkt
+    übergeben. Pro Klasse werden Wartezeiten gemessen.
+    """
+
+    def __init__(self, limits: Optional[Dict[int, int]] = None):
+        self.limits = dict(GATT_QUEUE_LIMITS if limits is None else limits)
+        self._heap: List[Tuple[int, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+        self._busy = False
+        self._pending = {p: 0 for p in PRIO_NAMES}
+        self._stats = {
+            p: {"jobs": 0, "rejected": 0, "wait_total_ms": 0.0, "wait_max_ms": 0.0}
+            for p in PRIO_NAMES
+        }
+
+    def _record_wait(self, prio: int, t0: float) -> None:
+        ms = (time.monotonic() - t0) * 1000.0
+        st = self._stats[prio]
+        st["jobs"] += 1
+        st["wait_total_ms"] += ms
+        st["wait_max_ms"] = max(st["wait_max_ms"], ms)
+
+    async def _acquire(self, prio: int) -> None:
+        t0 = time.monotonic()
+        if not self._busy and not self._heap:
+            self._busy = True
+            self._record_wait(prio, t0)
+            return
+        if self._pending[prio] >= self.limits.get(prio, 0):
+            self._stats[prio]["rejected"] += 1
+            raise GattQueueFull(
+                f"GATT-Queue '{PRIO_NAMES[prio]}' voll ({self._pending[prio]} wartend)"
+            )
+        fut = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._heap, (prio, next(self._seq), fut))
+        self._pending[prio] += 1
+        try:
+            await fut
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():
+                # Slot wurde schon übergeben -> an den Nächsten weiterreichen
+                self._release()
+            raise
+        finally:
+            self._pending[prio] -= 1
+        self._record_wait(prio, t0)
+
+    def _release(self) -> None:
+        while self._heap:
+            _, _, fut = heapq.heappop(self._heap)
+            if not fut.done():
+                fut.set_result(None)
+                return
+        self._busy = False
+
+    @contextlib.asynccontextmanager
+    async def slot(self, prio: int = PRIO_NORMAL):
+        await self._acquire(prio)
+        try:
+            yield
+        finally:
+            self._release()
+
+    def metrics(self) -> Dict[str, Dict]:
+        out = {}
+        for p, name in PRIO_NAMES.items():
+            st = self._stats[p]
+            out[name] = {
+                "queued": self._pending[p],
+                "limit": self.limits.get(p, 0),
+                "jobs": st["jobs"],
+                "rejected": st["rejected"],
+                "wait_avg_ms": round(st["wait_total_ms"] / st["jobs"], 2) if st["jobs"] else 0.0,
+                "wait_max_ms": round(st["wait_max_ms"], 2),
+            }
+        return out
+
+
+# ==== Advertisement-Index ====
+@dataclass
+class AdvEntry:
+    device: BLEDevice
+    name: str
+    rssi: float             # geglättet
+    service_uuids: List[str]
+    last_seen: float        # time.monotonic()
+
+    def as_dict(self) -> Dict:
+        return {
+            "address": self.device.address,
+            "name": self.name,
+            "rssi": int(round(self.rssi)),
+            "service_uuids": self.service_uuids,
+            "is_volcano": _looks_like_volcano(self.name, self.service_uuids),
+            "age_s": round(time.monotonic() - self.last_seen, 1),
+        }
+
+
+class AdvertIndex:
+    """Ein langlebiger Scanner, dessen Ergebnisse alle Aufrufer teilen.
+
+    /discover und _scan_pick_best antworten aus dem Index, statt jeweils einen
+    eigenen Scanner auf dem Adapter zu starten. Listener werden bei jedem
+    Advertisement synchron aufgerufen (nur kurze Arbeit!).
+
+    Watchdog: kommt eine TTL lang gar kein Advertisement (irgendeines Geräts),
+    gilt der Scanner als hängend (z.B. nach Adapter-Reset): der Index ist dann
+    nicht mehr "warm" und der Scanner wird neu gestartet.
+    """
+
+    def __init__(self, adapter: Optional[str] = None, ttl: float = ADV_TTL_S,
+                 devmode: bool = False):
+        self.adapter = adapter
+        self.ttl = ttl
+        self.devmode = devmode
+        self.entries: Dict[str, AdvEntry] = {}
+        self.started_at = 0.0
+        self.last_any = 0.0
+        self.restarts = 0
+        self._wanted = False
+        self._watchdog: Optional[asyncio.Task] = None
+        self._scanner: Optional[BleakScanner] = None
+        self._seen = asyncio.Event()
+        self._last_prune = 0.0
+        self._listeners: List[Callable[[AdvEntry], None]] = []
+
+    @property
+    def running(self) -> bool:
+        return self._scanner is not None
+
+    @property
+    def stalled(self) -> bool:
+        """Läuft, liefert aber seit einer TTL keine Advertisements mehr."""
+        if not self.running:
+            return False
+        return time.monotonic() - max(self.last_any, self.started_at) > self.ttl
+
+    @property
+    def warm(self) -> bool:
+        return (self.running and not self.stalled
+                and time.monotonic() - self.started_at >= ADV_WARMUP_S)
+
+    async def start(self) -> None:
+        self._wanted = True
+        await self._start_scanner()
+        if self._watchdog is None:
+            self._watchdog = asyncio.create_task(self._watch(), name="adv-index-watchdog")
+
+    async def _start_scanner(self) -> None:
+        if self._scanner is not None:
+            return
+        sc = BleakScanner(self._cb, **({"adapter": self.adapter} if self.adapter else {}))
+        await sc.start()
+        self._scanner = sc
+        self.started_at = time.monotonic()
+        if self.devmode:
+            print("[DEV] Advertisement-Index: Scanner läuft.")
+
+    async def _stop_scanner(self) -> None:
+        sc, self._scanner = self._scanner, None
+        if sc is not None:
+            try:
+                await sc.stop()
+            except Exception as e:
+                log_error("Advertisement-Index: Fehler beim Stoppen", e)
+
+    async def _watch(self) -> None:
+        while self._wanted:
+            await asyncio.sleep(max(1.0, self.ttl / 4))
+            if self.running and not self.stalled:
+                continue
+            if self.running:
+                log_error(f"Advertisement-Index: seit {self.ttl:.0f}s still – starte Scanner neu")
+                await self._stop_scanner()
+            try:
+                await self._start_scanner()
+                self.restarts += 1
+            except Exception as e:
+                # Bis zum nächsten Versuch läuft der Keep-Alive als Polling weiter
+                log_error("Advertisement-Index: Neustart fehlgeschlagen", e)
+
+    async def stop(self) -> None:
+        self._wanted = False
+        wd, self._watchdog = self._watchdog, None
+        if wd is not None:
+            wd.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await wd
+        await self._stop_scanner()
+
+    def add_listener(self, fn: Callable[[AdvEntry], None]) -> None:
+        self._listeners.append(fn)
+
+    def _cb(self, d: BLEDevice, a: AdvertisementData) -> None:
+        now = time.monotonic()
+        self.last_any = now
+        rssi = a.rssi if (a and a.rssi is not None) else -999
+        name = d.name or (a.local_name if a else None) or ""
+        uuids = (a.service_uuids or []) if a else []
+        e = self.entries.get(d.address)
+        if e is None or now - e.last_seen > self.ttl:
+            e = AdvEntry(d, name, float(rssi), list(uuids), now)
+            self.entries[d.address] = e
+        else:
+            e.device = d
+            e.name = name or e.name
+            e.rssi += ADV_RSSI_ALPHA * (rssi - e.rssi)
+            e.service_uuids = list(uuids) or e.service_uuids
+            e.last_seen = now
+        if now - self._last_prune >= 1.0:
+            self.prune(now)
+        self._seen.set()
+        self._seen = asyncio.Event()
+        for fn in self._listeners:
+            try:
+                fn(e)
+            except Exception as ex:
+                log_error("Advertisement-Index: Listener-Fehler", ex)
+
+    def prune(self, now: Optional[float] = None) -> None:
+        now = time.monotonic() if now is None else now
+        self._last_prune = now
+        for addr in [a for a, e in self.entries.items() if now - e.last_seen > self.ttl]:
+            del self.entries[addr]
+
+    def find(self, pred: Callable[[AdvEntry], bool]) -> List[AdvEntry]:
+        """Alle passenden Einträge, stärkstes RSSI zuerst."""
+        self.prune()
+        hits = [e for e in self.entries.values() if pred(e)]
+        hits.sort(key=lambda e: e.rssi, reverse=True)
+        return hits
+
+    async def wait_for(self, pred: Callable[[AdvEntry], bool],
+                       timeout: float) -> List[AdvEntry]:
+        """Wie find(), wartet aber bis zu `timeout` auf den ersten Treffer."""
+        deadline = time.monotonic() + timeout
+        while True:
+            hits = self.find(pred)
+            left = deadline - time.monotonic()
+            if hits or left <= 0 or not self.running:
+                return hits
+            try:
+                await asyncio.wait_for(self._seen.wait(), left)
+            except asyncio.TimeoutError:
+                pass
+
+
 # ==== BLE-Kern ====
 class VolcanoBLE:
     def __init__(
@@ -116,6 +646,12 @@ class VolcanoBLE:
         keepalive_interval: int = 60,
         preconnect: bool = True,
         devmode: bool = False,
+        state_max_age: float = STATE_MAX_AGE,
+        temp_coalesce_s: float = TEMP_COALESCE_S,
+        fast_writes: bool = FAST_WRITES,
+        adapter: Optional[str] = None,
+        early_exit: bool = True,
+        min_rssi: int = SCAN_MIN_RSSI,
     ):
         self.mac = mac
         self.scan_seconds = scan_seconds
@@ -123,33 +659,172 @@ class VolcanoBLE:
         self.keepalive_interval = keepalive_interval
         self.preconnect = preconnect
         self.devmode = devmode
+        self.state_max_age = state_max_age
+        self.temp_coalesce_s = temp_coalesce_s
+        self.fast_writes = fast_writes
+        self.adapter = adapter
+        self.early_exit = early_exit
+        self.min_rssi = min_rssi
 
         self.last_target_temp = DEFAULT_TEMP
 
         self.client: Optional[BleakClient] = None
-        self._lock = asyncio.Lock()
+        self._sched = GattScheduler()
         self._maintain_task: Optional[asyncio.Task] = None
         self._notify_started = False
 
         # Merke zuletzt erfolgreiche Adresse (für schnellere Reconnects)
         self._last_addr: Optional[str] = None
+        # BLEDevice aus dem letzten Scan – erspart bleak den eigenen Such-Scan
+        self._last_device: Optional[BLEDevice] = None
+        # Gemeinsamer Hintergrund-Scanner (von main_async gesetzt)
+        self.adv_index: Optional[AdvertIndex] = None
+        # Weckt den Maintain-Loop (Advertisement gesehen / Disconnect)
+        self._wake = asyncio.Event()
+
+        # Auto-Heizen nach (Re)Connect – Task auf dem Server-Loop
+        self._auto_heat_task: Optional[asyncio.Task] = None
+
+        # Verbindungs-Zustandsmaschine: genau ein Connect-Versuch gleichzeitig
+        self.conn_state = CONN_DISCONNECTED
+        self._conn_subs: List[asyncio.Queue] = []
+        self._connect_lock = asyncio.Lock()
+        self._fail_count = 0
+        self._retry_at = 0.0
+        # Zeitpunkt des letzten Verbindungsverlusts (monotonic, 0 = nie verbunden)
+        self._lost_at = 0.0
         # Einfache Retry-Policy für Read/Write nach Disconnect
         self._op_retry_once = True
 
+        # Notify-gespeister Zustands-Cache (Wert + Empfangszeit)
+        self.state: Dict[str, CharState] = {u: CharState() for u in STATE_CHARS}
+        self._state_changed = asyncio.Event()
+
+        # Coalescing für Zieltemperatur-Writes
+        self._temp_pending: Optional[float] = None
+        self._temp_waiters: List[asyncio.Future] = []
+        self._temp_flush_task: Optional[asyncio.Task] = None
+
+        # Pro Characteristic gelernter Write-Modus + offene Fast-Path-Bestätigungen
+        self.write_modes: Dict[str, WriteModeStats] = {}
+        self._confirm_tasks: set = set()
+        # Laufende Nummer je UUID: veraltete Bestätigungen erkennen
+        self._write_seq: Dict[str, int] = {}
+
+        # Pro Verbindung aufgelöste Characteristic-Objekte + festgelegte Fan-Variante
+        self._chars: Dict[str, BleakGATTCharacteristic] = {}
+        self._fan_on_uuid: Optional[str] = None
+        self._fan_off_uuid: Optional[str] = None
+
     def _on_disconnect(self, _client) -> None:
         """Callback von bleak bei unerwartetem Disconnect.
 
         Wichtig: Callback ist sync -> hier nur Status zurücksetzen, kein await.
         """
-        global WATCH_RUNNING
         print('\n' + ts() + 'BLE          : ' + 'getrennt                      ❌\n')
         try:
             if self.devmode:
                 print("[DEV] Disconnected-Callback: Verbindung verloren, markiere Client als None.")
         finally:
-            WATCH_RUNNING = False
             self.client = None
             self._notify_started = False
+            self._invalidate_state()
+            self._invalidate_chars()
+            self._set_conn_state(CONN_DISCONNECTED)
+            self._wake.set()
+
+    def _connected(self) -> bool:
+        return bool(self.client and getattr(self.client, "is_connected", False))
+
+    # --- Zustandsmaschine / Circuit-Breaker ---
+    def _set_conn_state(self, new: str) -> None:
+        if new == self.conn_state:
+            return
+        old, self.conn_state = self.conn_state, new
+        if old == CONN_CONNECTED:
+            self._lost_at = time.monotonic()
+        if self.devmode:
+            print(f"[DEV] Verbindung: {old} → {new}")
+        for q in self._conn_subs:
+            q.put_nowait((old, new))
+
+    def subscribe_state(self) -> asyncio.Queue:
+        """Queue, die jeden Zustandswechsel als (alt, neu) erhält."""
+        q: asyncio.Queue = asyncio.Queue()
+        self._conn_subs.append(q)
+        return q
+
+    def unsubscribe_state(self, q: asyncio.Queue) -> None:
+        with contextlib.suppress(ValueError):
+            self._conn_subs.remove(q)
+
+    def retry_after(self) -> float:
+        return max(0.0, self._retry_at - time.monotonic())
+
+    def _breaker_open(self) -> bool:
+        return self._fail_count >= BREAKER_THRESHOLD and self.retry_after() > 0
+
+    def _connect_failed(self) -> None:
+        self._fail_count += 1
+        if self._fail_count >= BREAKER_THRESHOLD:
+            n = self._fail_count - BREAKER_THRESHOLD
+            delay = min(BACKOFF_MAX_S, BACKOFF_BASE_S * (2 ** n))
+            self._retry_at = time.monotonic() + delay
+            self._set_conn_state(CONN_BACKOFF)
+            if self.devmode:
+                print(f"[DEV] Breaker offen: {self._fail_count} Fehlversuche, nächster in {delay:.0f}s")
+        else:
+            self._set_conn_state(CONN_DISCONNECTED)
+
+    def _connect_succeeded(self) -> None:
+        self._fail_count = 0
+        self._retry_at = 0.0
+        self._set_conn_state(CONN_CONNECTED)
+
+    def _visible(self) -> bool:
+        """Laut Advertisement-Index erreichbar (True, wenn kein Index läuft).
+
+        Verbunden sendet der Volcano keine Advertisements; bis der Index nach
+        einem Verbindungsverlust wieder aussagekräftig ist (TTL), gilt das
+        Gerät daher weiter als erreichbar.
+        """
+        idx = self.adv_index
+        if idx is None or not idx.warm:
+            return True
+        if self.conn_state == CONN_CONNECTED or (
+            self._lost_at and time.monotonic() - self._lost_at < idx.ttl
+        ):
+            return True
+        addr = self.mac or self._last_addr
+        if addr:
+            return bool(idx.find(lambda e: e.device.address.upper() == addr.upper()))
+        return bool(idx.find(lambda e: _looks_like_volcano(e.name, e.service_uuids)))
+
+    def _check_breaker(self) -> None:
+        if self._breaker_open():
+            raise DeviceUnavailable(
+                "Volcano nicht erreichbar (Backoff läuft)", self.retry_after()
+            )
+        if not self._visible():
+            # Gerät sendet nicht -> nicht blind scannen; der Index weckt den Reconnect
+            raise DeviceUnavailable(
+                "Volcano nicht in Reichweite/aus (kein Advertisement)", ADV_RECONNECT_MIN_S
+            )
+
+    def _on_advert(self, e: "AdvEntry") -> None:
+        """Listener des Advertisement-Index: Gerät sendet, wir sind getrennt -> sofort verbinden."""
+        if self._connected():
+            return
+        addr = self.mac or self._last_addr
+        if addr:
+            if e.device.address.upper() != addr.upper():
+                return
+        elif not _looks_like_volcano(e.name, e.service_uuids):
+            return
+        self._last_device = e.device
+        if not self._wake.is_set() and self.devmode:
+            print(f"[DEV] Advertisement von {e.device.address} → Reconnect")
+        self._wake.set()
 
     async def _reset_client(self):
         """Erzwingt sauberen Reset der aktuellen Client-Instanz."""
@@ -161,45 +836,187 @@ class VolcanoBLE:
             finally:
                 self.client = None
         self._notify_started = False
+        self._invalidate_state()
+        self._invalidate_chars()
+        self._set_conn_state(CONN_DISCONNECTED)
+
+    # --- Characteristic-Cache ---
+    def _resolve_chars(self, c: BleakClient) -> None:
+        """Bekannte UUIDs einmal gegen die Service-Collection auflösen.
+
+        Legt außerdem fest, welche Fan-Variante das Gerät tatsächlich anbietet,
+        und übernimmt reine write-without-response-Characteristics direkt ins
+        Write-Modus-Gedächtnis.
+        """
+        self._invalidate_chars()
+        svcs = getattr(c, "services", None)
+        if not svcs:
+            return
+        for uuid in KNOWN_CHARS:
+            try:
+                ch = svcs.get_characteristic(uuid)
+            except Exception as e:
+                log_error(f"Characteristic {uuid} nicht eindeutig auflösbar", e)
+                continue
+            if ch is None:
+                continue
+            self._chars[uuid] = ch
+            props = set(ch.properties)
+            if "write-without-response" in props and "write" not in props:
+                self.write_modes.setdefault(uuid, WriteModeStats()).no_ack_only = True
+        self._fan_on_uuid = next(
+            (u for u in (CHAR_FAN_ON, ALT_CHAR_FAN_ON) if u in self._chars), None
+        )
+        self._fan_off_uuid = next(
+            (u for u in (CHAR_FAN_OFF, ALT_CHAR_FAN_OFF) if u in self._chars), None
+        )
+        if self.devmode:
+            print(
+                f"[DEV] {len(self._chars)}/{len(KNOWN_CHARS)} Characteristics aufgelöst, "
+                f"Fan: {self._fan_on_uuid} / {self._fan_off_uuid}"
+            )
+
+    def _invalidate_chars(self) -> None:
+        self._chars = {}
+        self._fan_on_uuid = None
+        self._fan_off_uuid = None
+
+    def _char(self, uuid: str):
+        """Gecachtes Characteristic-Objekt, sonst die UUID (bleak löst dann selbst auf)."""
+        return self._chars.get(uuid, uuid)
+
+    # --- Zustands-Cache ---
+    def _update_state(self, uuid: str, data: bytes, confirmed: bool = True) -> None:
+        """Neuen Wert (Notify oder Read) übernehmen und Wartende wecken.
+
+        confirmed=False für optimistisch übernommene, eigene Writes.
+        """
+        st = self.state.get(uuid)
+        if st is None:
+            return
+        value_changed = st.value != bytes(data)
+        changed = value_changed or (confirmed and not st.confirmed)
+        st.value = bytes(data)
+        st.ts = time.monotonic()
+        st.confirmed = confirmed
+        if changed:
+            self._state_changed.set()
+            self._state_changed = asyncio.Event()
+        if value_changed:
+            kind = "temp" if uuid == CHAR_CURRENT_TEMP else "target"
+            emit(kind, value=_u16le_to_c(data), confirmed=confirmed)
+
+    def _invalidate_state(self) -> None:
+        """Nach Disconnect: Werte der alten Verbindung nicht mehr ausliefern."""
+        for st in self.state.values():
+            st.value = None
+            st.ts = 0.0
+            st.notify = False
+            st.confirmed = False
+
+    def _state_fresh(self, st: CharState, max_age: Optional[float]) -> bool:
+        if st.value is None:
+            return False
+        if not (self.client and getattr(self.client, "is_connected", False)):
+            return False
+        if max_age is None:
+            if st.notify:
+                return True
+            max_age = self.state_max_age
+        return st.age() <= max_age
+
+    async def wait_state_change(self, timeout: float) -> bool:
+        """Wartet bis zu `timeout` Sekunden auf einen geänderten Cache-Wert."""
+        try:
+            await asyncio.wait_for(self._state_changed.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def _start_state_notify(self, c: BleakClient):
+        """Temperatur-Characteristics abonnieren und einmalig vorbelegen.
+
+        Läuft innerhalb von _connect_once (Lock ist gehalten) -> direkt am
+        Client lesen, nicht über _read.
+        """
+        for uuid in STATE_CHARS:
+            def _cb(_, data: bytearray, uuid=uuid):
+                self._update_state(uuid, data)
+                if self.devmode:
+                    print(f"[DEV] NOTIFY {uuid} → {data.hex()}")
+
+            try:
+                await c.start_notify(self._char(uuid), _cb)
+                self.state[uuid].notify = True
+                if self.devmode:
+                    print(f"[DEV] State-Notify abonniert: {uuid}")
+            except Exception as e:
+                if self.devmode:
+                    print(f"[DEV] State-Notify fehlgeschlagen für {uuid}: {e}")
+                log_error(f"State-Notify fehlgeschlagen für {uuid}", e)
+            try:
+                self._update_state(uuid, await c.read_gatt_char(self._char(uuid)))
+            except Exception as e:
+                log_error(f"State-Vorbelegung fehlgeschlagen für {uuid}", e)
+
+    async def _read_cached(self, uuid: str, max_age: Optional[float] = None,
+                           prio: int = PRIO_NORMAL) -> bytes:
+        """Wert aus dem Zustands-Cache; GATT-Read nur, wenn der Wert veraltet ist."""
+        st = self.state.get(uuid)
+        if st is not None and self._state_fresh(st, max_age):
+            return st.value
+        return await self._read(uuid, prio=prio)
+
+    def cached_temps(self) -> Tuple[Optional[float], Optional[float]]:
+        """(Ist, Soll) aus dem Zustands-Cache – ohne GATT-Zugriff, None = unbekannt."""
+        if not self._connected():
+            return None, None
+        cur = self.state[CHAR_CURRENT_TEMP].value
+        tgt = self.state[CHAR_TARGET_TEMP].value
+        return (
+            _u16le_to_c(cur) if cur is not None else None,
+            _u16le_to_c(tgt) if tgt is not None else None,
+        )
 
     def ts(self) -> str:
         return datetime.now().strftime("%Y-%m-%d %H:%M:%S ")
 
-    def watch(self):
-        global WATCH_RUNNING
-        global DEFAULT_TEMP
-        global TEMP_INDEX
-        global TEMP_AVAILABLE
-        if WATCH_RUNNING:
+    def start_auto_heat(self) -> None:
+        """Startet auto_heat() als Task, falls nicht schon einer läuft."""
+        t = self._auto_heat_task
+        if t is not None and not t.done():
             return
-        WATCH_RUNNING = True
-        ok = False
-        url = f"http://127.0.0.1:8181/"
-        i = 0
-        while not ok:
+        if self.devmode:
+            print("[DEV] Auto-Heat gestartet.")
+        self._auto_heat_task = asyncio.create_task(auto_heat(self), name="volcano-auto-heat")
+
+    async def stop_auto_heat(self) -> None:
+        t, self._auto_heat_task = self._auto_heat_task, None
+        if t is not None and not t.done():
+            t.cancel()
             try:
-                aw = requests.get(url + 'status',timeout=20)
-                data = aw.json()
-                soll = str(int(data['target']))
-                ist = str(int(data['current']))
-                TEMP_INDEX = TEMP_AVAILABLE.index(soll) if soll in TEMP_AVAILABLE else 0
-                DEFAULT_TEMP = TEMP_AVAILABLE[TEMP_INDEX]
-                print(ts() + 'BLE          : ' + 'verbunden  '
-                                         + '                   ✅\n')
-                aw = requests.get(url + 'on?temp=' + str(int(data['target'])),timeout=20)
-                data = aw.json()
-                if(data['ok'] and 'EIN' in data['action']):
-                        ok = True
-                else:
-                    time.sleep(1)
-            except:
-                time.sleep(5)
-        FAN_STATE = 'Pumpen              : AUS'
-        WATCH_RUNNING = False
+                await t
+            except asyncio.CancelledError:
+                pass
 
-    async def _scan_pick_best(self, seconds: Optional[int] = None) -> Optional[str]:
+    def _is_target(self, address: str, name: Optional[str], uuids: List[str]) -> bool:
+        if self.mac:
+            return address.upper() == self.mac.upper()
+        return _looks_like_volcano(name, uuids)
+
+    async def _scan_pick_best(self, seconds: Optional[int] = None,
+                              early_exit: Optional[bool] = None) -> Optional[str]:
+        """Sucht den besten Volcano (stärkstes RSSI).
+
+        early_exit: Scan endet beim ersten Treffer mit RSSI >= min_rssi
+        (bzw. sobald die konfigurierte MAC auftaucht) statt nach `seconds`.
+        """
         seconds = seconds or self.scan_seconds
+        early_exit = self.early_exit if early_exit is None else early_exit
+        if self.adv_index is not None and self.adv_index.running and not self.adv_index.stalled:
+            return await self._pick_from_index(seconds)
         found: Dict[str, Tuple[BLEDevice, int, List[str], str]] = {}
+        hit = asyncio.Event()
 
         def cb(d: BLEDevice, a: AdvertisementData):
             rssi = a.rssi if (a and a.rssi is not None) else -999
@@ -208,18 +1025,28 @@ class VolcanoBLE:
             prev = found.get(d.address)
             if prev is None or rssi > prev[1]:
                 found[d.address] = (d, rssi, uuids, name)
+            if early_exit and self._is_target(d.address, name, uuids):
+                if self.mac or rssi >= self.min_rssi:
+                    hit.set()
 
         if self.devmode:
-            print(f"[DEV] Starte Scan ({seconds}s)…")
-        s = BleakScanner(cb)
+            print(f"[DEV] Starte Scan ({seconds}s{', Early-Exit' if early_exit else ''})…")
+        s = BleakScanner(cb, **self._adapter_kw())
+        t0 = time.monotonic()
         await s.start()
-        await asyncio.sleep(seconds)
-        await s.stop()
+        try:
+            await asyncio.wait_for(hit.wait(), seconds)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            await s.stop()
+        if self.devmode:
+            print(f"[DEV] Scan beendet nach {time.monotonic() - t0:.2f}s")
 
         volcanoes = [
             (addr, tup)
             for addr, tup in found.items()
-            if _looks_like_volcano(tup[3], tup[2])
+            if self._is_target(addr, tup[3], tup[2])
         ]
         if not volcanoes:
             if self.devmode:
@@ -227,10 +1054,29 @@ class VolcanoBLE:
             return None
         volcanoes.sort(key=lambda kv: kv[1][1], reverse=True)
         best_addr = volcanoes[0][0]
+        self._last_device = volcanoes[0][1][0]
         print(ts() + 'BLE          : Auto-Scan')
         print(ts() + 'BLE          : Gefunden ' + best_addr)
         return best_addr
 
+    async def _pick_from_index(self, seconds: float) -> Optional[str]:
+        """Wie _scan_pick_best, aber aus dem Advertisement-Index (kein eigener Scan)."""
+        def pred(e: AdvEntry) -> bool:
+            if not self._is_target(e.device.address, e.name, e.service_uuids):
+                return False
+            return bool(self.mac) or e.rssi >= self.min_rssi
+
+        hits = await self.adv_index.wait_for(pred, seconds)
+        if not hits:
+            if self.devmode:
+                print("[DEV] Index: Kein Volcano gesehen.")
+            return None
+        best = hits[0]
+        self._last_device = best.device
+        print(ts() + 'BLE          : Auto-Scan (Index)')
+        print(ts() + 'BLE          : Gefunden ' + best.device.address)
+        return best.device.address
+
     async def _dump_services(self, c: BleakClient):
         try:
             svcs = getattr(c, "services", None)
@@ -266,6 +1112,9 @@ class VolcanoBLE:
 
         for svc in svcs:
             for ch in svc.characteristics:
+                if ch.uuid in self.state and self.state[ch.uuid].notify:
+                    # Schon vom Zustands-Cache abonniert (loggt selbst im Devmode)
+                    continue
                 if "notify" in ch.properties:
                     try:
                         await c.start_notify(ch.uuid, await mk_cb(ch.uuid))
@@ -281,8 +1130,14 @@ class VolcanoBLE:
                         )
         self._notify_started = True
 
+    def _adapter_kw(self) -> Dict:
+        return {"adapter": self.adapter} if self.adapter else {}
+
     async def _connect_once(self) -> BleakClient:
-        addr = self.mac or self._last_addr or await self._scan_pick_best()
+        addr = self.mac or self._last_addr
+        if not addr:
+            self._set_conn_state(CONN_SCANNING)
+            addr = await self._scan_pick_best()
         if not addr:
             e = RuntimeError("Kein Volcano gefunden (Scan leer).")
             log_error("Connect fehlgeschlagen: kein Volcano gefunden", e)
@@ -297,39 +1152,68 @@ class VolcanoBLE:
             self.client = None
         if self.devmode:
             print(f"[DEV] Verbinde mit {addr} …")
-        c = BleakClient(addr, disconnected_callback=self._on_disconnect)
-        await c.connect()
-        if not getattr(c, "is_connected", False):
-            e = RuntimeError("BLE-Verbindung fehlgeschlagen.")
-            log_error("BLE-Verbindung fehlgeschlagen (is_connected=False)", e)
-            raise e
+        self._set_conn_state(CONN_CONNECTING)
+        dev = self._last_device
+        c = BleakClient(
+            dev if dev is not None and dev.address == addr else addr,
+            disconnected_callback=self._on_disconnect,
+            **self._adapter_kw(),
+        )
+        try:
+            await c.connect()
+            if not getattr(c, "is_connected", False):
+                e = RuntimeError("BLE-Verbindung fehlgeschlagen.")
+                log_error("BLE-Verbindung fehlgeschlagen (is_connected=False)", e)
+                raise e
+        except Exception:
+            if not self.mac and addr == self._last_addr:
+                # Gemerkte (evtl. persistierte) Adresse verwerfen -> nächster Versuch scannt
+                self._last_addr = None
+                self._last_device = None
+            raise
         self.client = c
         self._last_addr = addr
-
-        #Auto-Start über internen HTTP-Call (nutzt die zuletzt gesetzte Zieltemperatur)
-        # Watch (auto-heat) nach (Re)Connect starten
-        global WATCH_RUNNING
-        if not WATCH_RUNNING:
-            threading.Thread(target=self.watch, daemon=True).start()
+        schedule_persist(self)
+        self._resolve_chars(c)
+        await self._start_state_notify(c)
 
         if self.devmode:
             await self._dump_services(c)
             await self._start_notify_sniffer(c)
         return c
 
-    async def ensure_connected(self) -> BleakClient:
-        if self.client and getattr(self.client, "is_connected", False):
+    async def ensure_connected(self, force: bool = False) -> BleakClient:
+        """Liefert einen verbundenen Client.
+
+        Gleichzeitige Aufrufer teilen sich einen Connect-Versuch. Ist der
+        Breaker offen, scheitert der Aufruf sofort mit DeviceUnavailable;
+        force=True (Maintain-Loop/Preconnect) ignoriert den Breaker.
+        """
+        if self._connected():
             return self.client
-        return await self._connect_once()
+        if not force:
+            self._check_breaker()
+        async with self._connect_lock:
+            if self._connected():
+                return self.client
+            if not force:
+                self._check_breaker()
+            try:
+                c = await self._connect_once()
+            except Exception:
+                self._connect_failed()
+                raise
+            self._connect_succeeded()
+            return c
 
     # --- Primitive ops (mit DEV-Logs) ---
-    async def _read(self, uuid: str) -> bytes:
-        async with self._lock:
+    async def _read(self, uuid: str, prio: int = PRIO_NORMAL) -> bytes:
+        async with self._sched.slot(prio):
             c = await self.ensure_connected()
             if self.devmode:
                 print(f"[DEV] READ  {uuid} …")
             try:
-                data = await c.read_gatt_char(uuid)
+                data = await c.read_gatt_char(self._char(uuid))
             except Exception as e:
                 # Typisches Szenario: Gerät war aus -> is_connected bleibt "true", aber READ knallt.
                 log_error(f"READ {uuid} fehlgeschlagen – versuche Reconnect", e)
@@ -337,31 +1221,49 @@ class VolcanoBLE:
                     print(f"[DEV] READ {uuid} fehlgeschlagen: {e} (Reconnect & Retry)")
                 await self._reset_client()
                 c = await self.ensure_connected()
-                data = await c.read_gatt_char(uuid)
+                data = await c.read_gatt_char(self._char(uuid))
             if self.devmode:
                 print(f"[DEV] READ  {uuid} → { _hex(data) }")
+            self._update_state(uuid, data)
             return data
 
 
-    async def _write_safe(self, uuid: str, data: bytes):
-        async with self._lock:
+    async def _write_timed(self, c: BleakClient, uuid: str, data: bytes,
+                           response: bool, wm: WriteModeStats, learn: bool = True):
+        t0 = time.monotonic()
+        try:
+            await c.write_gatt_char(self._char(uuid), data, response=response)
+        except Exception:
+            # Nur Fehler bei stehender Verbindung sagen etwas über den Modus
+            live = bool(getattr(c, "is_connected", False))
+            wm.record(response, False, (time.monotonic() - t0) * 1000.0, live=live, learn=learn)
+            raise
+        wm.record(response, True, (time.monotonic() - t0) * 1000.0, learn=learn)
+        if self.devmode:
+            print(f"[DEV] WRITE {uuid} ✓ (response={response})")
+
+    async def _write_safe(self, uuid: str, data: bytes, prio: int = PRIO_NORMAL,
+                          fast: Optional[bool] = None):
+        if fast is None:
+            fast = self.fast_writes and uuid in self.state
+        seq = self._write_seq.get(uuid, 0) + 1
+        self._write_seq[uuid] = seq
+        async with self._sched.slot(prio):
             c = await self.ensure_connected()
+            wm = self.write_modes.setdefault(uuid, WriteModeStats())
+            # Fast-Path: ohne Response, Bestätigung läuft im Hintergrund
+            first = False if fast else wm.preferred()
             if self.devmode:
-                print(f"[DEV] WRITE {uuid} ← { _hex(data) } (response=True)")
+                print(f"[DEV] WRITE {uuid} ← { _hex(data) } (response={first})")
+            t_write = time.monotonic()
             try:
                 try:
-                    await c.write_gatt_char(uuid, data, response=True)
-                    if self.devmode:
-                        print(f"[DEV] WRITE {uuid} ✓ (response=True)")
-                    return
+                    await self._write_timed(c, uuid, data, first, wm)
                 except Exception as e:
                     if self.devmode:
-                        print(f"[DEV] WRITE {uuid} response=True fehlgeschlagen: {e} → ohne Response")
-                    log_error(f"WRITE {uuid} response=True fehlgeschlagen – Versuch mit response=False", e)
-                    await c.write_gatt_char(uuid, data, response=False)
-                    if self.devmode:
-                        print(f"[DEV] WRITE {uuid} ✓ (response=False)")
-                    return
+                        print(f"[DEV] WRITE {uuid} response={first} fehlgeschlagen: {e} → response={not first}")
+                    log_error(f"WRITE {uuid} response={first} fehlgeschlagen – Versuch mit response={not first}", e)
+                    await self._write_timed(c, uuid, data, not first, wm)
             except Exception as e:
                 # Wenn das Gerät zwischendurch aus war, hilft oft nur: Client verwerfen, neu verbinden, neu schreiben.
                 log_error(f"WRITE {uuid} endgültig fehlgeschlagen – Reconnect & Retry", e)
@@ -369,44 +1271,137 @@ class VolcanoBLE:
                     print(f"[DEV] WRITE {uuid} endgültig fehlgeschlagen: {e} (Reconnect & Retry)")
                 await self._reset_client()
                 c = await self.ensure_connected()
-                # Noch ein Versuch – diesmal ohne response-Logik-Spielchen.
-                await c.write_gatt_char(uuid, data, response=False)
+                # Noch ein Versuch im bevorzugten Modus – zählt nicht fürs Lernen,
+                # der Fehler lag an der Verbindung, nicht am Modus.
+                retry_resp = wm.preferred()
+                await self._write_timed(c, uuid, data, retry_resp, wm, learn=False)
                 if self.devmode:
-                    print(f"[DEV] WRITE {uuid} ✓ (nach Reconnect, response=False)")
+                    print(f"[DEV] WRITE {uuid} ✓ (nach Reconnect, response={retry_resp})")
+        if fast:
+            task = asyncio.create_task(self._confirm_write(uuid, data, t_write, seq))
+            self._confirm_tasks.add(task)
+            task.add_done_callback(self._confirm_tasks.discard)
+
+    async def _confirm_write(self, uuid: str, data: bytes, t_write: float, seq: int):
+        """Fast-Path-Write per Notify oder verzögertem Read bestätigen.
+
+        Schlägt die Bestätigung fehl, wird mit response=True nachgeschrieben –
+        außer es wurde inzwischen neuer auf dieselbe UUID geschrieben.
+        """
+        st = self.state[uuid]
+        wm = self.write_modes[uuid]
+        deadline = t_write + FAST_CONFIRM_S
+        try:
+            while not (st.confirmed and st.ts >= t_write and st.value == data):
+                left = deadline - time.monotonic()
+                if left <= 0:
+                    break
+                await self.wait_state_change(left)
+            else:
+                return
+            if self._write_seq.get(uuid) != seq:
+                return
+            if await self._read(uuid, prio=PRIO_BACKGROUND) == data:
+                return
+            if self._write_seq.get(uuid) != seq:
+                # Neuerer Write unterwegs -> der alte Wert darf nicht zurück
+                return
+            wm.record(False, False, FAST_CONFIRM_S * 1000.0)
+            log_error(f"WRITE {uuid} ohne Response nicht bestätigt – schreibe mit Response nach")
+            await self._write_safe(uuid, data, prio=PRIO_USER, fast=False)
+        except Exception as e:
+            log_error(f"WRITE {uuid}: Bestätigung fehlgeschlagen", e)
 
 
     # --- High-level bekannte Funktionen ---
-    async def current_temp(self) -> Optional[float]:
-        return _u16le_to_c(await self._read(CHAR_CURRENT_TEMP))
+    async def current_temp(self, max_age: Optional[float] = None,
+                           prio: int = PRIO_NORMAL) -> Optional[float]:
+        return _u16le_to_c(await self._read_cached(CHAR_CURRENT_TEMP, max_age, prio))
 
-    async def target_temp(self) -> Optional[float]:
-        return _u16le_to_c(await self._read(CHAR_TARGET_TEMP))
+    async def target_temp(self, max_age: Optional[float] = None,
+                          prio: int = PRIO_NORMAL) -> Optional[float]:
+        return _u16le_to_c(await self._read_cached(CHAR_TARGET_TEMP, max_age, prio))
 
-    async def set_temp(self, t: float):
+    async def _write_temp(self, t: float):
         v = max(0, min(2600, int(round(t * 10))))
-        await self._write_safe(CHAR_TARGET_TEMP, v.to_bytes(2, "little"))
+        data = v.to_bytes(2, "little")
+        await self._write_safe(CHAR_TARGET_TEMP, data, prio=PRIO_USER)
+        # Optimistisch übernehmen; das Notify des Geräts bestätigt später.
+        self._update_state(CHAR_TARGET_TEMP, data, confirmed=False)
+
+    async def _flush_temp(self):
+        await asyncio.sleep(self.temp_coalesce_s)
+        t = self._temp_pending
+        waiters, self._temp_waiters = self._temp_waiters, []
+        # Anfragen ab hier öffnen ein neues Fenster
+        self._temp_flush_task = None
+        if self.devmode and len(waiters) > 1:
+            print(f"[DEV] set_temp: {len(waiters)} Anfragen → 1 Write ({t})")
+        try:
+            await self._write_temp(t)
+        except Exception as e:
+            for f in waiters:
+                if not f.done():
+                    f.set_exception(e)
+            return
+        for f in waiters:
+            if not f.done():
+                f.set_result(t)
+
+    async def set_temp(self, t: float) -> float:
+        """Setzt die Zieltemperatur und liefert den tatsächlich geschriebenen Wert.
+
+        Innerhalb von temp_coalesce_s wird nur der zuletzt angeforderte Wert
+        geschrieben; überholte Aufrufe bekommen diesen Endwert zurück.
+        """
+        if self.temp_coalesce_s <= 0:
+            await self._write_temp(t)
+            return t
+        fut = asyncio.get_running_loop().create_future()
+        self._temp_pending = t
+        self._temp_waiters.append(fut)
+        if self._temp_flush_task is None:
+            self._temp_flush_task = asyncio.create_task(self._flush_temp())
+        return await fut
 
     async def heat_on(self):
-        await self._write_safe(CHAR_HEAT_ON, b"\x01")
+        await self._write_safe(CHAR_HEAT_ON, b"\x01", prio=PRIO_USER)
 
     async def heat_off(self):
-        await self._write_safe(CHAR_HEAT_OFF, b"\x01")
+        await self._write_safe(CHAR_HEAT_OFF, b"\x01", prio=PRIO_USER)
 
     async def fan_on(self):
+        # Erst verbinden: die Fan-Variante wird beim Connect aufgelöst
+        await self.ensure_connected()
+        if self._fan_on_uuid:
+            # Variante ist seit dem Connect bekannt -> kein Probieren
+            await self._write_safe(self._fan_on_uuid, b"\x01", prio=PRIO_USER)
+            return
+        # Nur wenn die Auflösung nichts gefunden hat: Kandidaten probieren
         for uuid in (CHAR_FAN_ON, ALT_CHAR_FAN_ON):
             try:
-                await self._write_safe(uuid, b"\x01")
+                await self._write_safe(uuid, b"\x01", prio=PRIO_USER)
                 return
+            except (DeviceUnavailable, GattQueueFull):
+                # Kein Kandidaten-Problem -> an fail() durchreichen (503)
+                raise
             except Exception as e:
                 log_error(f"fan_on: Fehler beim Schreiben {uuid}", e)
                 pass
         raise RuntimeError("fan_on: keine passende Characteristic erreichbar")
 
     async def fan_off(self):
+        await self.ensure_connected()
+        if self._fan_off_uuid:
+            await self._write_safe(self._fan_off_uuid, b"\x01", prio=PRIO_USER)
+            return
         for uuid in (CHAR_FAN_OFF, ALT_CHAR_FAN_OFF):
             try:
-                await self._write_safe(uuid, b"\x01")
+                await self._write_safe(uuid, b"\x01", prio=PRIO_USER)
                 return
+            except (DeviceUnavailable, GattQueueFull):
+                # Kein Kandidaten-Problem -> an fail() durchreichen (503)
+                raise
             except Exception as e:
                 log_error(f"fan_off: Fehler beim Schreiben {uuid}", e)
                 pass
@@ -415,10 +1410,28 @@ class VolcanoBLE:
     # --- Keep-Alive ---
     async def _maintain_loop(self):
         while True:
+            idx = self.adv_index
+            adv_mode = idx is not None and idx.running and not idx.stalled
+            if adv_mode and not self._connected():
+                # Getrennt: idle, bis das Advertisement des Geräts kommt. Der
+                # Timeout ist das Sicherheitsnetz, falls der Index verstummt.
+                self._wake.clear()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), self.keepalive_interval)
+                except asyncio.TimeoutError:
+                    if idx.warm and not self._visible():
+                        # Index gesund, Gerät sendet nicht -> weiter warten
+                        continue
+            elif not self._connected() and self.retry_after() > 0:
+                # Backoff abwarten, dann als einziger Prober neu versuchen
+                await asyncio.sleep(self.retry_after())
             try:
-                await self.ensure_connected()
+                await self.ensure_connected(force=True)
                 try:
-                    await self._read(CHAR_CURRENT_TEMP)
+                    # Echter Read nur, wenn seit einem Intervall kein Notify kam
+                    # (erkennt "Gerät aus, is_connected noch true").
+                    await self.current_temp(max_age=self.keepalive_interval,
+                                            prio=PRIO_BACKGROUND)
                 except Exception:
                     # Lese-Fehler auf Temperatur sind nicht kritisch
                     pass
@@ -426,7 +1439,15 @@ class VolcanoBLE:
                 if self.devmode:
                     print(f"[DEV] Keep-Alive Problem: {e}")
                 log_error("Keep-Alive Problem", e)
-            await asyncio.sleep(self.keepalive_interval)
+                if adv_mode:
+                    await asyncio.sleep(ADV_RECONNECT_MIN_S)
+                    continue
+            # Nächster Keep-Alive nach Intervall; ein Disconnect weckt sofort
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.keepalive_interval)
+            except asyncio.TimeoutError:
+                pass
 
     async def startup(self):
         # Robuster Preconnect mit mehreren Versuchen
@@ -439,7 +1460,7 @@ class VolcanoBLE:
                         print(
                             f"[DEV] Preconnect-Versuch {attempt}/{max_attempts} …"
                         )
-                    await self.ensure_connected()
+                    await self.ensure_connected(force=True)
                     if self.devmode:
                         print("[DEV] Preconnect erfolgreich.")
                     break
@@ -466,6 +1487,9 @@ class VolcanoBLE:
             self._maintain_task = asyncio.create_task(self._maintain_loop())
 
     async def shutdown(self):
+        await flush_persist(self)
+        await self.stop_auto_heat()
+
         # Keep-Alive-Task stoppen
         if self._maintain_task:
             self._maintain_task.cancel()
@@ -488,9 +1512,12 @@ class VolcanoBLE:
 
 # ==== Discover ====
 async def discover_ble(
-    seconds: int = 5, volcano_only: bool = True
+    seconds: int = 5, volcano_only: bool = True, adapter: Optional[str] = None,
+    limit: Optional[int] = None,
 ) -> List[Dict]:
+    """Scan für /discover. limit: Scan endet, sobald so viele Geräte gefunden sind."""
     found: Dict[str, Tuple[str, int, List[str]]] = {}
+    enough = asyncio.Event()
 
     def cb(d: BLEDevice, a: AdvertisementData):
         rssi = a.rssi if (a and a.rssi is not None) else -999
@@ -498,11 +1525,22 @@ async def discover_ble(
         uuids = (a.service_uuids or []) if a else []
         if d.address not in found or rssi > found[d.address][1]:
             found[d.address] = (name, rssi, uuids)
+        if limit:
+            n = sum(
+                1 for (nm, _, us) in found.values()
+                if not volcano_only or _looks_like_volcano(nm, us)
+            )
+            if n >= limit:
+                enough.set()
 
-    scanner = BleakScanner(cb)
+    scanner = BleakScanner(cb, **({"adapter": adapter} if adapter else {}))
     await scanner.start()
-    await asyncio.sleep(max(2, seconds))
-    await scanner.stop()
+    try:
+        await asyncio.wait_for(enough.wait(), max(2, seconds))
+    except asyncio.TimeoutError:
+        pass
+    finally:
+        await scanner.stop()
     items = []
     for addr, (name, rssi, uuids) in found.items():
         iv = _looks_like_volcano(name, uuids)
@@ -518,67 +1556,78 @@ async def discover_ble(
             }
         )
     items.sort(key=lambda x: x["rssi"], reverse=True)
-    return items
+    return items[:limit] if limit else items
 
 
-# ==== Verbose-Monitor ====
-async def monitor_connection(v: "VolcanoBLE", interval: int = 10):
-    connected = False
-    old = True
-    url = "http://127.0.0.1:8181/off"
+# ==== Auto-Heizen ====
+async def auto_heat(v: "VolcanoBLE") -> None:
+    """Nach (Re)Connect: am Gerät eingestellte Zieltemperatur übernehmen und heizen.
+
+    Läuft als Task auf dem Server-Loop und ruft VolcanoBLE direkt auf
+    (früher: watch()-Thread mit HTTP-Loopback auf /status und /on).
+    """
+    global DEFAULT_TEMP
+    global TEMP_INDEX
     while True:
-        connected = bool(v.client and getattr(v.client, "is_connected", False))
-        if connected and not old:
-            pass #oder await send_notify(None, v, 'Online             : EIN', 'online')
-        if connected:
-            old = True
-        if not connected:
-            t = threading.Thread(target=v.watch, daemon=True)
-            t.start()
-            if old:
-                try:
-                    await send_notify(None, v, 'Online             : AUS', 'offline')
-                    old = False
-                except Exception as e:
-                    pass
-            await asyncio.sleep(interval)
-        await asyncio.sleep(interval)
+        try:
+            soll = str(int(await v.target_temp()))
+            TEMP_INDEX = TEMP_AVAILABLE.index(soll) if soll in TEMP_AVAILABLE else 0
+            DEFAULT_TEMP = TEMP_AVAILABLE[TEMP_INDEX]
+            print(ts() + 'BLE          : ' + 'verbunden  '
+                                     + '                   ✅\n')
+            await apply_on(None, v, soll)
+            if v.devmode:
+                print(f"[DEV] Auto-Heat fertig ({soll} °C).")
+            return
+        except asyncio.CancelledError:
+            raise
+        except DeviceUnavailable as e:
+            await asyncio.sleep(max(1.0, e.retry_after))
+        except Exception as e:
+            log_error("Auto-Heat fehlgeschlagen – neuer Versuch", e)
+            await asyncio.sleep(5)
 
 
-# noinspection PyTypeChecker
-def value_to_rgb(v: float, vmin=0, vmax=230):
-    v = max(vmin, min(vmax, v))
-    t = (v - vmin) / (vmax - vmin)
-    if t <= 0.5:
-        tt = t / 0.5
-        r = int(0 + (255 - 0) * tt)
-        g = int(0 + (255 - 0) * tt)
-        b = int(255 + (0 - 255) * tt)
-    else:
-        tt = (t - 0.5) / 0.5
-        r = 255
-        g = int(255 + (0 - 255) * tt)
-        b = 0
-    return r, g, b
-
-def make_ball_icon(value: float, size: int = 88) -> str:
-    from PIL import Image, ImageDraw
-    import os, tempfile
-    r, g, b = value_to_rgb(value)
-    img = Image.new("RGBA", (size, size), (0, 0, 0, 0))
-    d = ImageDraw.Draw(img)
-
-    # Kreis + leichter Rand/Glanz
-    pad = 1
-    d.ellipse((pad, pad, size - pad, size - pad), fill=(r, g, b, 255))
-    d.ellipse((pad, pad, size - pad, size - pad), outline=(0, 0, 0, 80), width=1)
-    d.ellipse((pad+8, pad+8, size//8, size//8), fill=(255, 255, 255, 60))
-
-    fd, path = tempfile.mkstemp(prefix="volcano_ball_", suffix=".png")
-    os.close(fd)
-    img.save(path, "PNG")
-    return path
+# ==== Verbose-Monitor ====
+async def monitor_connection(v: "VolcanoBLE"):
+    """Reagiert auf Verbindungswechsel (Events aus VolcanoBLE, kein Polling).
+
+    - verbunden      -> Auto-Heizen starten
+    - Verbindung weg -> Auto-Heizen abbrechen, einmalig Offline-Notification
+    """
+    q = v.subscribe_state()
+    offline_sent = False
+
+    async def _offline():
+        nonlocal offline_sent
+        if offline_sent:
+            return
+        offline_sent = True
+        try:
+            await send_notify(None, v, 'Online             : AUS', 'offline')
+        except Exception as e:
+            log_error("monitor_connection: Offline-Notification fehlgeschlagen", e)
+
+    try:
+        if v._connected():
+            v.start_auto_heat()
+        else:
+            await _offline()
+        while True:
+            old, new = await q.get()
+            if new == CONN_CONNECTED:
+                offline_sent = False
+                emit("connected", address=v._last_addr)
+                v.start_auto_heat()
+            elif old == CONN_CONNECTED:
+                emit("disconnected", address=v._last_addr)
+                await v.stop_auto_heat()
+                await _offline()
+    finally:
+        v.unsubscribe_state(q)
 
+
+# noinspection PyTypeChecker
 def map_value(temp: int) -> int:
     ranges = [(160, 174), (174, 189), (190, 209), (210, 220), (221, 230)]
     values = [80, 0, -5, -10, 0]
@@ -698,24 +1747,240 @@ def vaporizer_text(temp_c: int, icon: bool = False, terpene: bool = False) -> st
         return '🚫' if icon else "Wirkung: Risiko       THC: ---    CBD: ++-    CBN: ++-"
 
 
-def ts() -> str:
-    return datetime.now().strftime("%Y-%m-%d %H:%M:%S ")
+def ts(t: Optional[float] = None) -> str:
+    d = datetime.now() if t is None else datetime.fromtimestamp(t)
+    return d.strftime("%Y-%m-%d %H:%M:%S ")
+
+
+# ==== Desktop-Notifications ====
+# Bursts innerhalb dieses Fensters (Sekunden) werden zu einer Notification.
+NOTIFY_COALESCE_S = 0.1
+# Mindestabstand (Sekunden) zwischen zwei Notifications derselben Klasse.
+NOTIFY_MIN_INTERVAL = {"heat": 1.0, "fan": 0.0, "online": 5.0, "other": 0.5}
+
+
+def notify_class(action: str) -> str:
+    if action.startswith("Heizen"):
+        return "heat"
+    if action.startswith("Pumpen"):
+        return "fan"
+    if action.startswith("Online"):
+        return "online"
+    return "other"
+
+
+class NotifyGate:
+    """Stufe vor dem Notification-Backend: Dedupe, Rate-Limit, Burst-Coalescing.
+
+    - Dedupe: identischer gerenderter Zustand (Soll, Ist, Aktion, Icon) wie
+      die zuletzt gesendete Notification -> verworfen.
+    - Coalescing/Rate-Limit: pro Klasse wartet höchstens eine Notification;
+      neuere ersetzen sie, gesendet wird nach NOTIFY_COALESCE_S bzw. frühestens
+      NOTIFY_MIN_INTERVAL nach der letzten dieser Klasse.
+    Liest nie selbst vom Gerät – es sieht nur fertig gerenderte Zustände.
+    """
+
+    def __init__(self, window: float = NOTIFY_COALESCE_S,
+                 min_interval: Optional[Dict[str, float]] = None):
+        self.window = window
+        self.min_interval = dict(NOTIFY_MIN_INTERVAL if min_interval is None else min_interval)
+        self._last_key: Optional[tuple] = None
+        self._last_sent: Dict[str, float] = {}
+        self._pending: Dict[str, Tuple[tuple, Callable]] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self.stats = {"submitted": 0, "sent": 0, "deduped": 0, "coalesced": 0, "failed": 0}
+
+    def submit(self, cls: str, key: tuple, send: Callable) -> None:
+        self.stats["submitted"] += 1
+        if cls in self._pending:
+            self.stats["coalesced"] += 1
+        elif key == self._last_key:
+            self.stats["deduped"] += 1
+            return
+        self._pending[cls] = (key, send)
+        t = self._tasks.get(cls)
+        if t is None or t.done():
+            self._tasks[cls] = asyncio.create_task(self._flush(cls))
+
+    async def _flush(self, cls: str) -> None:
+        # Schleife: was während send() eingereicht wird, hat keinen eigenen Task
+        while cls in self._pending:
+            now = time.monotonic()
+            due = self._last_sent.get(cls, 0.0) + self.min_interval.get(cls, 0.0)
+            await asyncio.sleep(max(self.window, due - now))
+            key, send = self._pending.pop(cls)
+            if key == self._last_key:
+                self.stats["deduped"] += 1
+                continue
+            self._last_key = key
+            self._last_sent[cls] = time.monotonic()
+            try:
+                await send()
+                self.stats["sent"] += 1
+            except Exception as e:
+                self.stats["failed"] += 1
+                log_error(f"Notification ({cls}) fehlgeschlagen", e)
+
+    async def close(self, timeout: float = 1.0) -> None:
+        """Wartende Notifications kurz zustellen lassen, Rest verwerfen."""
+        tasks = [t for t in self._tasks.values() if not t.done()]
+        if tasks:
+            _, pending = await asyncio.wait(tasks, timeout=timeout)
+            for t in pending:
+                t.cancel()
+        self._tasks.clear()
+        self._pending.clear()
+
+
+NOTIFY_BUS_NAME = "org.freedesktop.Notifications"
+NOTIFY_OBJ_PATH = "/org/freedesktop/Notifications"
+NOTIFY_URGENCY = {"low": 0, "normal": 1, "critical": 2}
+
+
+class DbusNotifier:
+    """org.freedesktop.Notifications über eine dauerhafte async D-Bus-Verbindung.
+
+    Nutzt dbus-fast (kommt unter Linux mit bleak). Die Replace-ID wird im
+    Speicher gehalten. bus_address=None -> Session-Bus; zum Testen kann die
+    Adresse eines eigenen `dbus-daemon --session --print-address` übergeben werden.
+    Icons können roh als "image-data"-Hint (RGBA im Speicher) übergeben werden.
+    """
+    name = "dbus"
+    supports_image_data = True
+
+    def __init__(self, app_name: str = NOTIFY_APP_NAME, bus_address: Optional[str] = None):
+        self.app_name = app_name
+        self.bus_address = bus_address
+        self.replace_id = 0
+        self._bus = None
+        self._lock = asyncio.Lock()
+
+    async def connect(self):
+        if self._bus is None or not self._bus.connected:
+            from dbus_fast.aio import MessageBus
+            self._bus = await MessageBus(bus_address=self.bus_address).connect()
+        return self._bus
+
+    async def _call(self, title: str, body: str, icon: str, urgency: str,
+                    timeout_ms: int, transient: bool, image=None) -> int:
+        from dbus_fast import Message, MessageType, Variant
+        bus = await self.connect()
+        hints = {"urgency": Variant("y", NOTIFY_URGENCY.get(urgency, 1))}
+        if transient:
+            hints["transient"] = Variant("b", True)
+        if image is not None:
+            hints["image-data"] = Variant("(iiibiiay)", list(image.image_data()))
+        reply = await bus.call(Message(
+            destination=NOTIFY_BUS_NAME,
+            path=NOTIFY_OBJ_PATH,
+            interface=NOTIFY_BUS_NAME,
+            member="Notify",
+            signature="susssasa{sv}i",
+            body=[self.app_name, self.replace_id, icon or "", title, body,
+                  [], hints, timeout_ms],
+        ))
+        if reply.message_type == MessageType.ERROR:
+            raise RuntimeError(f"D-Bus Notify: {reply.error_name} {reply.body}")
+        return int(reply.body[0])
+
+    async def notify(self, title: str, body: str, icon: str = "",
+                     urgency: str = "normal", timeout_ms: int = 10000,
+                     transient: bool = True, image=None) -> int:
+        # Seriell, damit parallele Notifications dieselbe Replace-ID nutzen
+        async with self._lock:
+            try:
+                nid = await self._call(title, body, icon, urgency, timeout_ms, transient, image)
+            except Exception as e:
+                # z.B. Notification-Daemon neu gestartet -> einmal frisch verbinden
+                log_error("D-Bus Notify fehlgeschlagen – verbinde neu", e)
+                await self.close()
+                nid = await self._call(title, body, icon, urgency, timeout_ms, transient, image)
+            self.replace_id = nid
+            return nid
+
+    async def close(self) -> None:
+        bus, self._bus = self._bus, None
+        if bus is not None:
+            with contextlib.suppress(Exception):
+                bus.disconnect()
+
+
+class NotifySendNotifier:
+    """Fallback: notify-send als asyncio-Subprozess (blockiert den Loop nicht)."""
+    name = "notify-send"
+    # notify-send kann keine Rohdaten -> Icon immer als Datei
+    supports_image_data = False
+
+    def __init__(self, path: str, app_name: str = NOTIFY_APP_NAME):
+        self.path = path
+        self.app_name = app_name
+        self.replace_id = 0
+        self._lock = asyncio.Lock()
+
+    async def notify(self, title: str, body: str, icon: str = "",
+                     urgency: str = "normal", timeout_ms: int = 10000,
+                     transient: bool = True, image=None) -> int:
+        cmd = [
+            self.path,
+            "--expire-time", str(timeout_ms),
+            "--urgency", urgency,
+            "--app-name", self.app_name,
+            "-p",
+        ]
+        if icon:
+            cmd += ["--icon", icon]
+        if transient:
+            cmd += ["-h", "boolean:transient:true"]
+        async with self._lock:
+            if self.replace_id:
+                cmd += ["--replace-id", str(self.replace_id)]
+            proc = await asyncio.create_subprocess_exec(
+                *cmd, title, body,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.DEVNULL,
+            )
+            out, _ = await proc.communicate()
+            first = out.decode(errors="replace").strip().split("\n")[0].strip()
+            if first.isdigit():
+                self.replace_id = int(first)
+            return self.replace_id
+
+    async def close(self) -> None:
+        pass
+
+
+async def make_notifier(backend: str = "auto", bus_address: Optional[str] = None):
+    """Wählt das Notification-Backend: D-Bus bevorzugt, notify-send als Fallback."""
+    if backend in ("auto", "dbus"):
+        n = DbusNotifier(bus_address=bus_address)
+        try:
+            await n.connect()
+            return n
+        except Exception as e:
+            log_error("D-Bus-Notifications nicht verfügbar", e)
+            if backend == "dbus":
+                return None
+    if backend in ("auto", "notify-send") and NOTIFY_PATH:
+        return NotifySendNotifier(NOTIFY_PATH)
+    return None
 
 async def send_notify(req, v, title: str, body: str, timeout_ms: int = 10000) -> None:
-    """Zentraler Helper für Desktop-Notifications via notify-send."""
-    from volcano_icons import get_cached_icon
-    global TO_KILL_NOTIFICATION
-    global LAST_PRINT
+    """Berechnet den aktuellen Zustand und veröffentlicht ihn als "render"-Event.
+
+    Terminal- und Desktop-Ausgabe rendern die Sinks des Event-Bus selbst.
+    """
     global FAN_STATE
     ist = 0
     soll = 0
     level = 'normal'
-    if req:
+    if req or v._connected():
         level = 'normal'
-        resp = await status(req)
-        ist = json.loads(resp.text)["current"]
-        soll = json.loads(resp.text)["target"]
+        # Nur bekannter Zustand – Notifications lösen keine GATT-Reads aus
+        ist, soll = v.cached_temps()
+        ist = ist or 0
+        soll = soll or 0
     delta = soll - ist
+    action = title.strip()
     if 'GET /fan/on' in str(req):
         level = 'critical'
     if 'GET /fan/off' in str(req):
@@ -752,72 +2017,68 @@ async def send_notify(req, v, title: str, body: str, timeout_ms: int = 10000) ->
         val = ist
         if val > 220:
             val = 230
-        icon_path = get_cached_icon(int(ist - map_value(val)))
+        icon_value = int(ist - map_value(val))
         body = ""
         body += vaporizer_text(temp_c=soll, terpene=True)
-        cmd: list[str] = [
-        NOTIFY_PATH,
-        "--expire-time", str(timeout_ms),
-        "--icon", icon_path,
-        "--urgency", level,
-        "--replace-id", str(TO_KILL_NOTIFICATION),
-        "--app-name", "Volcano http",
-        "-h", "boolean:transient:true",
-        "-p",
-        title,
-        body
-        ]
-        res = subprocess.run(cmd, capture_output=True,  text=True)
-        TO_KILL_NOTIFICATION = res.stdout.strip().split("\n")[0].strip()
-        try:
-            LAST_PRINT = LAST_PRINT
-        except:
-            LAST_PRINT = ''
-
-        if 'Heizen' in title:
-            if ist < soll or ist == soll:
-                title =  title.replace('AUS','EIN')
-            if ist > soll:
-                title =  title.replace('EIN','AUS')
-            if title.count(str(int(soll))) == 2:
-                print(ts() + title.replace(ball, ersatzball))
-                set_timer(1)
-        new_print = title.replace(ball,'').split('Ist')[0].strip()
-        if ist==soll==0:
-            ersatzball  = '❌'
-        if 'Soll:  0' in title:
-            title = title.replace('Soll:  ','Soll:   ')
-        if 'Ist:  0' in title:
-            title = title.replace('Ist:  ','Ist:   ')
-        if new_print not in LAST_PRINT:
-            print(ts() + title.replace(ball, ersatzball))
-        LAST_PRINT = new_print
-        if 'Online             : AUS' in title:
-            print()
+        publish_render({
+            "title": title,
+            "body": body,
+            "icon_value": icon_value,
+            "urgency": level,
+            "timeout_ms": timeout_ms,
+            "cls": notify_class(action),
+            "key": (int(soll), int(ist), action, ball),
+            "ist": ist,
+            "soll": soll,
+            "ball": ball,
+            "ersatzball": ersatzball,
+        })
 
         if 'GET /fan/on' in str(req):
             pass#set_timer(int(timeout_ms/1000) -1)
         if delta < 0:
-            asyncio.create_task(notify_http_event(req, v, "Heizen             : AUS"))
+            start_heat_follower(req, v, "Heizen             : AUS")
         elif delta > 0:
-            asyncio.create_task(notify_http_event(req, v, "Heizen             : EIN"))
+            start_heat_follower(req, v, "Heizen             : EIN")
 
     except Exception as e:
         print(str(e))
-        log_error("send_notify: Fehler beim Aufruf von notify-send", e)
+        log_error("send_notify: Fehler beim Senden der Notification", e)
+
+
+def start_heat_follower(req, v: "VolcanoBLE", action: str) -> None:
+    """Startet die Aufheiz-Fortschrittsanzeige, falls noch keine läuft."""
+    global HEAT_FOLLOWER
+    if HEAT_FOLLOWER is not None and not HEAT_FOLLOWER.done():
+        return
+    HEAT_FOLLOWER = asyncio.create_task(_follow_heat(req, v, action))
+
+
+async def _follow_heat(req, v: "VolcanoBLE", action: str) -> None:
+    """Fortschritts-Notifications, bis Ist == Soll (bzw. Verbindung weg).
+
+    Wartet jeweils auf die nächste Temperatur-Änderung aus dem Zustands-Cache
+    (höchstens NOTIFY_FOLLOW_S), liest also selbst nie vom Gerät.
+    """
+    while True:
+        await v.wait_state_change(NOTIFY_FOLLOW_S)
+        await notify_http_event(req, v, action)
+        cur, tgt = v.cached_temps()
+        if not cur or not tgt:
+            return
+        if cur == tgt:
+            emit("ready", temp=cur)
+            return
+        action = "Heizen             : AUS" if tgt < cur else "Heizen             : EIN"
 
 
 async def notify_http_event(req, v: "VolcanoBLE", action: str,
                             current: Optional[float] = None,
                             target: Optional[float] = None) -> None:
-    """HTTP-Event-Notification mit Soll- und Ist-Temperatur."""
+    """HTTP-Event-Notification mit Soll- und Ist-Temperatur (aus dem Cache)."""
 
-    try:
-        if current is None or target is None:
-            current, target = await asyncio.gather(v.current_temp(), v.target_temp())
-    except Exception as e:
-        log_error("notify_http_event: Fehler beim Lesen der Temperaturen", e)
-        return
+    if current is None or target is None:
+        current, target = v.cached_temps()
 
     try:
         cur_txt = "?" if current is None else f"{current:.1f} °C"
@@ -835,6 +2096,425 @@ async def notify_http_event(req, v: "VolcanoBLE", action: str,
         log_error("notify_http_event: Fehler bei send_notify", e)
 
 
+# ==== Nachgelagerte Side-Effects ====
+# Kapazität der Queue; volle Queue -> Side-Effect wird verworfen (gezählt).
+SIDE_EFFECT_QUEUE_MAX = 64
+# Max. Wartezeit (Sekunden) beim Abarbeiten der Rest-Queue im Shutdown.
+SIDE_EFFECT_DRAIN_S = 5.0
+
+
+class SideEffects:
+    """Begrenzte Queue für Arbeit, die nach der HTTP-Antwort laufen darf.
+
+    Command-Handler antworten, sobald der GATT-Write bestätigt ist; Notifications
+    laufen danach über einen Worker (Reihenfolge bleibt erhalten).
+    """
+
+    def __init__(self, maxsize: int = SIDE_EFFECT_QUEUE_MAX):
+        self._q: asyncio.Queue = asyncio.Queue(maxsize)
+        self._worker: Optional[asyncio.Task] = None
+        self.stats = {
+            "enqueued": 0, "done": 0, "failed": 0, "dropped": 0,
+            "max_depth": 0, "lag_total_ms": 0.0, "lag_max_ms": 0.0,
+        }
+
+    def start(self) -> None:
+        if self._worker is None:
+            self._worker = asyncio.create_task(self._run(), name="volcano-side-effects")
+
+    def submit(self, fn: Callable, *args) -> bool:
+        try:
+            self._q.put_nowait((time.monotonic(), fn, args))
+        except asyncio.QueueFull:
+            self.stats["dropped"] += 1
+            log_error(f"Side-Effect verworfen (Queue voll): {getattr(fn, '__name__', fn)}")
+            return False
+        self.stats["enqueued"] += 1
+        self.stats["max_depth"] = max(self.stats["max_depth"], self._q.qsize())
+        return True
+
+    async def _run(self) -> None:
+        while True:
+            t0, fn, args = await self._q.get()
+            lag = (time.monotonic() - t0) * 1000.0
+            self.stats["lag_total_ms"] += lag
+            self.stats["lag_max_ms"] = max(self.stats["lag_max_ms"], lag)
+            try:
+                await fn(*args)
+                self.stats["done"] += 1
+            except Exception as e:
+                self.stats["failed"] += 1
+                log_error(f"Side-Effect {getattr(fn, '__name__', fn)} fehlgeschlagen", e)
+            finally:
+                self._q.task_done()
+
+    async def drain(self, timeout: float = SIDE_EFFECT_DRAIN_S) -> None:
+        """Rest-Queue abarbeiten (max. `timeout` Sekunden), dann Worker stoppen."""
+        # Immer join(): qsize() ist 0, während der Worker noch das letzte Element ausführt
+        if self._worker is not None:
+            try:
+                await asyncio.wait_for(self._q.join(), timeout)
+            except asyncio.TimeoutError:
+                log_error(f"Side-Effects: {self._q.qsize()} beim Shutdown nicht abgearbeitet")
+        if self._worker is not None:
+            self._worker.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._worker
+            self._worker = None
+
+    def metrics(self) -> Dict:
+        st = dict(self.stats)
+        handled = st["done"] + st["failed"]
+        st["queued"] = self._q.qsize()
+        st["limit"] = self._q.maxsize
+        st["lag_avg_ms"] = round(st.pop("lag_total_ms") / handled, 2) if handled else 0.0
+        st["lag_max_ms"] = round(st["lag_max_ms"], 2)
+        return st
+
+
+def defer(fn: Callable, *args) -> None:
+    """Coroutine-Funktion nach der Antwort ausführen (über SIDE_EFFECTS)."""
+    if SIDE_EFFECTS is not None:
+        SIDE_EFFECTS.submit(fn, *args)
+    else:
+        asyncio.create_task(fn(*args))
+
+
+# ==== Event-Bus ====
+# Queue-Länge je Sink; Überlauf je nach drop-Policy (ältestes/neuestes weg).
+EVENT_QUEUE_MAX = 100
+# Fachliche Events (für Webhook/Datei); "render" ist reine Darstellung.
+STATE_EVENTS = ("connected", "disconnected", "heating", "heat_off", "ready", "fan")
+# Messwerte aus dem Zustands-Cache (Notify/Read), nur für Live-Clients
+LIVE_EVENTS = STATE_EVENTS + ("temp", "target")
+
+
+class EventSink:
+    """Basis für Sinks: eigene Queue + eigener Worker.
+
+    Ein langsamer Sink staut nur seine eigene Queue; publish() blockiert nie.
+    kinds=None -> alle Events, sonst nur die genannten.
+    """
+    name = "sink"
+
+    def __init__(self, kinds: Optional[Tuple[str, ...]] = None,
+                 maxsize: int = EVENT_QUEUE_MAX, drop: str = "oldest"):
+        self.kinds = kinds
+        self.drop = drop
+        self._q: asyncio.Queue = asyncio.Queue(maxsize)
+        self.stats = {"delivered": 0, "dropped": 0, "failed": 0}
+
+    def offer(self, ev: Dict) -> None:
+        if self.kinds is not None and ev["kind"] not in self.kinds:
+            return
+        try:
+            self._q.put_nowait(ev)
+            return
+        except asyncio.QueueFull:
+            self.stats["dropped"] += 1
+        if self.drop == "oldest":
+            self._q.get_nowait()
+            # verworfenes Element gilt als erledigt, sonst hängt join()
+            self._q.task_done()
+            self._q.put_nowait(ev)
+
+    async def run(self) -> None:
+        while True:
+            ev = await self._q.get()
+            try:
+                await self.handle(ev)
+                self.stats["delivered"] += 1
+            except Exception as e:
+                self.stats["failed"] += 1
+                log_error(f"Event-Sink {self.name}: {ev.get('kind')} fehlgeschlagen", e)
+            finally:
+                self._q.task_done()
+
+    async def handle(self, ev: Dict) -> None:
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        pass
+
+    def metrics(self) -> Dict:
+        return {**self.stats, "queued": self._q.qsize(), "limit": self._q.maxsize,
+                "drop": self.drop}
+
+
+class TerminalSink(EventSink):
+    """Rendert "render"-Events als Terminal-Zeilen; gleiche Zustände nur einmal."""
+    name = "terminal"
+
+    def __init__(self):
+        super().__init__(kinds=("render",))
+        self.last_print = ''
+
+    def render_lines(self, ev: Dict) -> List[str]:
+        title = ev["title"]
+        ist, soll = ev["ist"], ev["soll"]
+        ball, ersatzball = ev["ball"], ev["ersatzball"]
+        stamp = ts(ev.get("ts"))
+        lines: List[str] = []
+        if 'Heizen' in title:
+            if ist < soll or ist == soll:
+                title =  title.replace('AUS','EIN')
+            if ist > soll:
+                title =  title.replace('EIN','AUS')
+            if title.count(str(int(soll))) == 2:
+                lines.append(stamp + title.replace(ball, ersatzball))
+                set_timer(1)
+        new_print = title.replace(ball,'').split('Ist')[0].strip()
+        if ist==soll==0:
+            ersatzball  = '❌'
+        if 'Soll:  0' in title:
+            title = title.replace('Soll:  ','Soll:   ')
+        if 'Ist:  0' in title:
+            title = title.replace('Ist:  ','Ist:   ')
+        if new_print not in self.last_print:
+            lines.append(stamp + title.replace(ball, ersatzball))
+        self.last_print = new_print
+        if 'Online             : AUS' in title:
+            lines.append("")
+        return lines
+
+    async def handle(self, ev: Dict) -> None:
+        for line in self.render_lines(ev):
+            print(line)
+
+
+class DesktopSink(EventSink):
+    """Reicht Render-Events an NotifyGate/NOTIFIER weiter."""
+    name = "desktop"
+
+    def __init__(self):
+        # Nur der aktuellste Zustand zählt -> ältere verwerfen
+        super().__init__(kinds=("render",), maxsize=8)
+
+    async def handle(self, ev: Dict) -> None:
+        _desktop_notify(ev)
+
+
+class WebhookSink(EventSink):
+    """POSTet fachliche Events als JSON an eine URL (gepoolte aiohttp-Session)."""
+    name = "webhook"
+
+    def __init__(self, url: str, timeout_s: float = 5.0):
+        super().__init__(kinds=STATE_EVENTS)
+        self.url = url
+        self.timeout_s = timeout_s
+        self._session: Optional[ClientSession] = None
+
+    async def handle(self, ev: Dict) -> None:
+        if self._session is None or self._session.closed:
+            self._session = ClientSession(
+                connector=TCPConnector(limit=4),
+                timeout=ClientTimeout(total=self.timeout_s),
+            )
+        async with self._session.post(self.url, json=ev) as resp:
+            if resp.status >= 400:
+                raise RuntimeError(f"Webhook {self.url}: HTTP {resp.status}")
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+
+class JsonlSink(EventSink):
+    """Hängt fachliche Events als JSON-Zeilen an eine Datei an (im Executor)."""
+    name = "file"
+
+    def __init__(self, path: str):
+        super().__init__(kinds=STATE_EVENTS, maxsize=1000)
+        self.path = path
+        self._f = None
+
+    def _write(self, line: str) -> None:
+        if self._f is None:
+            self._f = open(self.path, "a", encoding="utf-8")
+        self._f.write(line + "\n")
+        self._f.flush()
+
+    async def handle(self, ev: Dict) -> None:
+        line = json.dumps(ev, ensure_ascii=False)
+        await asyncio.get_running_loop().run_in_executor(None, self._write, line)
+
+    async def close(self) -> None:
+        if self._f is not None:
+            self._f.close()
+            self._f = None
+
+
+# SSE: Replay-Puffer für Last-Event-ID, Heartbeat, Queue je Client
+SSE_REPLAY_MAX = 256
+SSE_HEARTBEAT_S = 15.0
+SSE_CLIENT_QUEUE = 64
+SSE_RETRY_MS = 3000
+
+
+class SseSink(EventSink):
+    """Verteilt Live-Events an beliebig viele /events-Clients.
+
+    Ein BLE-Notify-Strom -> n HTTP-Watcher, ohne zusätzliche GATT-Reads.
+    Zu langsame Clients werden getrennt (sie holen per Last-Event-ID nach).
+    """
+    name = "sse"
+
+    def __init__(self, replay: int = SSE_REPLAY_MAX):
+        super().__init__(kinds=LIVE_EVENTS)
+        self.replay: collections.deque = collections.deque(maxlen=replay)
+        self.clients: List[asyncio.Queue] = []
+        self.stats["kicked"] = 0
+
+    async def handle(self, ev: Dict) -> None:
+        self.replay.append(ev)
+        for q in list(self.clients):
+            try:
+                q.put_nowait(ev)
+            except asyncio.QueueFull:
+                # Client hängt hinterher -> trennen statt Speicher wachsen lassen
+                self.stats["kicked"] += 1
+                self.clients.remove(q)
+                self._kick(q)
+
+    @staticmethod
+    def _kick(q: asyncio.Queue) -> None:
+        """Platz schaffen und Ende-Marker (None) einreihen."""
+        with contextlib.suppress(asyncio.QueueEmpty):
+            q.get_nowait()
+            q.task_done()
+        q.put_nowait(None)
+
+    def subscribe(self, last_id: Optional[int]) -> Tuple[asyncio.Queue, List[Dict], bool]:
+        """Neue Client-Queue + nachzuholende Events.
+
+        complete=False, wenn last_id älter als der Puffer ist (Lücke).
+        """
+        q: asyncio.Queue = asyncio.Queue(SSE_CLIENT_QUEUE)
+        self.clients.append(q)
+        if last_id is None:
+            return q, [], True
+        if not self.replay or last_id > self.replay[-1]["id"]:
+            # ID aus einem früheren Serverlauf (Zähler beginnt neu bei 1)
+            return q, [], False
+        backlog = [ev for ev in self.replay if ev["id"] > last_id]
+        return q, backlog, self.replay[0]["id"] <= last_id + 1
+
+    def unsubscribe(self, q: asyncio.Queue) -> None:
+        with contextlib.suppress(ValueError):
+            self.clients.remove(q)
+
+    async def close(self) -> None:
+        for q in self.clients:
+            self._kick(q)
+        self.clients = []
+
+    def metrics(self) -> Dict:
+        return {**super().metrics(), "clients": len(self.clients),
+                "replay": len(self.replay)}
+
+
+class EventBus:
+    """Zustandswechsel werden einmal veröffentlicht und an alle Sinks verteilt."""
+
+    def __init__(self):
+        self.sinks: List[EventSink] = []
+        self._tasks: List[asyncio.Task] = []
+        self._seq = itertools.count(1)
+
+    def add(self, sink: EventSink) -> EventSink:
+        self.sinks.append(sink)
+        if self._tasks:
+            self._tasks.append(asyncio.create_task(sink.run(), name=f"sink-{sink.name}"))
+        return sink
+
+    def start(self) -> None:
+        if not self._tasks:
+            self._tasks = [
+                asyncio.create_task(s.run(), name=f"sink-{s.name}") for s in self.sinks
+            ]
+
+    def publish(self, kind: str, **data) -> Dict:
+        ev = {"id": next(self._seq), "ts": time.time(), "kind": kind, **data}
+        for s in self.sinks:
+            s.offer(ev)
+        return ev
+
+    async def close(self, timeout: float = 1.0) -> None:
+        """Sinks kurz leerlaufen lassen, dann stoppen."""
+        joins = [asyncio.create_task(s._q.join()) for s in self.sinks]
+        if joins:
+            _, pending = await asyncio.wait(joins, timeout=timeout)
+            for t in pending:
+                t.cancel()
+        for t in self._tasks:
+            t.cancel()
+        for t in self._tasks:
+            with contextlib.suppress(asyncio.CancelledError):
+                await t
+        self._tasks = []
+        for s in self.sinks:
+            try:
+                await s.close()
+            except Exception as e:
+                log_error(f"Event-Sink {s.name}: Fehler beim Schließen", e)
+
+    def metrics(self) -> Dict:
+        return {s.name: s.metrics() for s in self.sinks}
+
+
+def emit(kind: str, **data) -> None:
+    """Fachliches Event veröffentlichen (no-op ohne Bus)."""
+    if EVENTS is not None:
+        EVENTS.publish(kind, **data)
+
+
+def _desktop_notify(ev: Dict) -> None:
+    """Render-Event als Desktop-Notification einreihen (wartet nicht)."""
+    if NOTIFIER is None:
+        return
+    from volcano_icons import get_cached_icon_async
+
+    async def _send():
+        icon, image = "", None
+        if ICONS is not None and NOTIFIER.supports_image_data:
+            # Rohes RGBA aus dem Speicher – kein Dateisystem im Hot Path
+            try:
+                image = await ICONS.raw(ev["icon_value"])
+            except Exception as e:
+                log_error("Roh-Icon nicht verfügbar – nutze Datei", e)
+        if image is None:
+            if ICONS is not None:
+                icon = await ICONS.path(ev["icon_value"])
+            else:
+                icon = await get_cached_icon_async(ev["icon_value"])
+        await NOTIFIER.notify(
+            ev["title"], ev["body"], icon=icon, image=image,
+            urgency=ev["urgency"], timeout_ms=ev["timeout_ms"],
+        )
+
+    if NOTIFY_GATE is not None:
+        NOTIFY_GATE.submit(ev["cls"], ev["key"], _send)
+    else:
+        defer(_send)
+
+
+# Terminal-Ausgabe ohne Event-Bus (vor dem Start / nach dem Shutdown)
+_FALLBACK_TERMINAL: Optional[TerminalSink] = None
+
+
+def publish_render(render: Dict) -> None:
+    global _FALLBACK_TERMINAL
+    if EVENTS is not None:
+        EVENTS.publish("render", **render)
+        return
+    if _FALLBACK_TERMINAL is None:
+        _FALLBACK_TERMINAL = TerminalSink()
+    for line in _FALLBACK_TERMINAL.render_lines(render):
+        print(line)
+    _desktop_notify(render)
+
+
 def ok(d):
     return web.json_response({"ok": True, **d})
 
@@ -843,6 +2523,24 @@ def err(m, code=500):
     return web.json_response({"ok": False, "error": m}, status=code)
 
 
+def fail(e: BaseException, code: int = 500):
+    """Fehlerantwort; DeviceUnavailable/GattQueueFull werden zu 503 mit retry_after."""
+    if isinstance(e, DeviceUnavailable):
+        return web.json_response(
+            {"ok": False, "error": str(e), "retry_after": round(e.retry_after, 1)},
+            status=503,
+            headers={"Retry-After": str(max(1, math.ceil(e.retry_after)))},
+        )
+    if isinstance(e, GattQueueFull):
+        # Überlast, kein Gerätefehler -> kurz später erneut
+        return web.json_response(
+            {"ok": False, "error": str(e), "retry_after": 1},
+            status=503,
+            headers={"Retry-After": "1"},
+        )
+    return err(str(e), code)
+
+
 # ==== HTTP Handlers (User-API) ====
 async def status(req):
     v: VolcanoBLE = req.app["v"]
@@ -855,6 +2553,7 @@ async def status(req):
                 "current": ct,
                 "target": tt,
                 "connected": connected,
+                "state": v.conn_state,
                 "selected": target,
             }
         )
@@ -863,64 +2562,84 @@ async def status(req):
             print("[DEV] /status Exception:")
             traceback.print_exc()
         log_error("/status Exception", e)
-        return err(str(e))
+        return fail(e)
 
-async def on(req):
+async def apply_on(req, v: VolcanoBLE, t: Optional[str]) -> Dict:
+    """Kern von /on: Zieltemperatur setzen (Leiter oder `t`) und heizen.
+
+    Wird vom HTTP-Handler und von auto_heat() genutzt.
+    """
     global DEFAULT_TEMP
     global TEMP_AVAILABLE
     global TEMP_INDEX
+    temp_val = float(TEMP_AVAILABLE[TEMP_INDEX])
+    if t:
+        if t == 'FAV':
+            t = FAV_TEMP
+        temp_val = float(t)
+        i = - 1
+        for temp in TEMP_AVAILABLE:
+            i += 1
+            if int(temp) > temp_val:
+                TEMP_INDEX = i
+                break
+    temp_old = DEFAULT_TEMP
+    # Leiter-Position VOR dem (gebündelten) Write weiterschalten, sonst
+    # lesen schnell aufeinanderfolgende Presses alle denselben Index.
+    try:
+        if not t:
+            v.last_target_temp = str(temp_val).split('.')[0].split(',')[0]
+            DEFAULT_TEMP = v.last_target_temp
+            TEMP_INDEX += 1
+            if TEMP_INDEX == len(TEMP_AVAILABLE):
+                TEMP_INDEX = 0
+    except Exception:
+        pass
+    final = await v.set_temp(temp_val)
+    # Erst nach dem Write, entprellt und off-loop
+    schedule_persist(v)
+    superseded = final != temp_val
+    what = "Heizen             : EIN"
+    if DEFAULT_TEMP < temp_old:
+        what = "Heizen             : AUS"
+    ret_t = (float(t) if t else DEFAULT_TEMP)
+    if superseded:
+        # Ein späterer Press hat gewonnen – dessen Request heizt & meldet.
+        ret_t = final if t else str(int(final))
+        return {"action": what + ' ' + str(ret_t) + ' °C', "target": ret_t,
+                "superseded": True}
+    await v.heat_on()
+    emit("heating", target=final)
+    defer(notify_http_event, req, v, what)
+    return {"action": what + ' ' + str(ret_t) + ' °C', "target": ret_t,
+            "superseded": False}
+
+
+async def on(req):
     v: VolcanoBLE = req.app["v"]
     try:
-        t = req.query.get("temp")
-        temp_val = float(TEMP_AVAILABLE[TEMP_INDEX])
-        if t:
-            if t == 'FAV':
-                t = FAV_TEMP
-            temp_val = float(t)
-            i = - 1
-            for temp in TEMP_AVAILABLE:
-                i += 1
-                if int(temp) > temp_val:
-                    TEMP_INDEX = i
-                    break
-        temp_old = DEFAULT_TEMP
-        await v.set_temp(temp_val)
-        try:
-            if not t:
-                v.last_target_temp = str(temp_val).split('.')[0].split(',')[0]
-                DEFAULT_TEMP = v.last_target_temp
-                TEMP_INDEX += 1
-                if TEMP_INDEX == len(TEMP_AVAILABLE):
-                    TEMP_INDEX = 0
-        except Exception:
-            pass
-        what = "Heizen             : EIN"
-        if DEFAULT_TEMP < temp_old:
-            what = "Heizen             : AUS"
-        await notify_http_event(req, v, what)
-        await v.heat_on()
-        ret_t = (float(t) if t else DEFAULT_TEMP)
-        return ok({"action": what + ' ' + str(ret_t) + ' °C', "target": ret_t})
+        return ok(await apply_on(req, v, req.query.get("temp")))
     except Exception as e:
         if req.app["devmode"]:
             print("[DEV] /on Exception:")
             traceback.print_exc()
         log_error("/on Exception", e)
-        return err(str(e))
+        return fail(e)
 
 
 async def off(req):
     v: VolcanoBLE = req.app["v"]
     try:
         await v.heat_off()
-        await notify_http_event(req, v, "Pumpen              : AUS")
+        emit("heat_off")
+        defer(notify_http_event, req, v, "Pumpen              : AUS")
         return ok({"action": "Pumpen              : AUS"})
     except Exception as e:
         if req.app["devmode"]:
             print("[DEV] /off Exception:")
             traceback.print_exc()
         log_error("/off Exception", e)
-        return err(str(e))
+        return fail(e)
 
 
 async def fan_on(req):
@@ -928,7 +2647,8 @@ async def fan_on(req):
     v: VolcanoBLE = req.app["v"]
     try:
         await v.fan_on()
-        await notify_http_event(req, v, "Pumpen              : EIN")
+        emit("fan", on=True)
+        defer(notify_http_event, req, v, "Pumpen              : EIN")
         FAN_STATE = 'Pumpen              : EIN'
         return ok({"action": "Pumpen              : EIN"})
     except Exception as e:
@@ -936,7 +2656,7 @@ async def fan_on(req):
             print("[DEV] /fan/on Exception:")
             traceback.print_exc()
         log_error("/fan/on Exception", e)
-        return err(str(e))
+        return fail(e)
 
 
 async def fan_off(req):
@@ -944,7 +2664,8 @@ async def fan_off(req):
     v: VolcanoBLE = req.app["v"]
     try:
         await v.fan_off()
-        await notify_http_event(req, v, "Pumpen              : AUS")
+        emit("fan", on=False)
+        defer(notify_http_event, req, v, "Pumpen              : AUS")
         FAN_STATE = 'Pumpen              : AUS'
         return ok({"action": "Pumpen              : AUS"})
     except Exception as e:
@@ -952,7 +2673,7 @@ async def fan_off(req):
             print("[DEV] /fan/off Exception:")
             traceback.print_exc()
         log_error("/fan/off Exception", e)
-        return err(str(e))
+        return fail(e)
 
 
 # ==== HTTP Handlers (Dev-Tools) ====
@@ -964,7 +2685,7 @@ async def settings_snapshot(req):
     try:
         for uuid in SETTINGS_CANDIDATES:
             try:
-                val = await v._read(uuid)
+                val = await v._read(uuid, prio=PRIO_BACKGROUND)
                 out[uuid] = val.hex()
             except Exception as e:
                 out[uuid] = f"ERR:{e}"
@@ -974,7 +2695,7 @@ async def settings_snapshot(req):
         print("[DEV] /settings/snapshot Exception:")
         traceback.print_exc()
         log_error("/settings/snapshot Exception", e)
-        return err(str(e))
+        return fail(e)
 
 
 async def dev_read(req):
@@ -991,7 +2712,7 @@ async def dev_read(req):
         print("[DEV] /dev/read Exception:")
         traceback.print_exc()
         log_error("/dev/read Exception", e)
-        return err(str(e))
+        return fail(e)
 
 
 async def dev_write_bool(req):
@@ -1010,7 +2731,7 @@ async def dev_write_bool(req):
         print("[DEV] /dev/write/bool Exception:")
         traceback.print_exc()
         log_error("/dev/write/bool Exception", e)
-        return err(str(e))
+        return fail(e)
 
 
 async def dev_write_u8(req):
@@ -1029,7 +2750,7 @@ async def dev_write_u8(req):
         print("[DEV] /dev/write/u8 Exception:")
         traceback.print_exc()
         log_error("/dev/write/u8 Exception", e)
-        return err(str(e))
+        return fail(e)
 
 
 async def dev_write_u16le(req):
@@ -1049,7 +2770,7 @@ async def dev_write_u16le(req):
         print("[DEV] /dev/write/u16le Exception:")
         traceback.print_exc()
         log_error("/dev/write/u16le Exception", e)
-        return err(str(e))
+        return fail(e)
 
 
 async def dev_write_hex(req):
@@ -1072,7 +2793,46 @@ async def dev_write_hex(req):
         print("[DEV] /dev/write/hex Exception:")
         traceback.print_exc()
         log_error("/dev/write/hex Exception", e)
-        return err(str(e))
+        return fail(e)
+
+
+async def dev_scheduler(req):
+    if not req.app["devmode"]:
+        return err("Not available without --devmode", 404)
+    v: VolcanoBLE = req.app["v"]
+    return ok({"scheduler": v._sched.metrics()})
+
+
+async def dev_writemodes(req):
+    if not req.app["devmode"]:
+        return err("Not available without --devmode", 404)
+    v: VolcanoBLE = req.app["v"]
+    return ok({
+        "fast_writes": v.fast_writes,
+        "write_modes": {u: wm.as_dict() for u, wm in v.write_modes.items()},
+    })
+
+
+async def dev_notify(req):
+    if not req.app["devmode"]:
+        return err("Not available without --devmode", 404)
+    return ok({
+        "backend": NOTIFIER.name if NOTIFIER else None,
+        "gate": NOTIFY_GATE.stats if NOTIFY_GATE else None,
+        "icons": ICONS.metrics() if ICONS else None,
+    })
+
+
+async def dev_events(req):
+    if not req.app["devmode"]:
+        return err("Not available without --devmode", 404)
+    return ok({"sinks": EVENTS.metrics() if EVENTS else None})
+
+
+async def dev_sideeffects(req):
+    if not req.app["devmode"]:
+        return err("Not available without --devmode", 404)
+    return ok({"side_effects": SIDE_EFFECTS.metrics() if SIDE_EFFECTS else None})
 
 
 # ==== Discover-Handler ====
@@ -1080,22 +2840,136 @@ async def discover_handler(req):
     try:
         seconds = int(req.query.get("seconds", "5"))
         show_all = req.query.get("all") in ("1", "true", "yes")
-        items = await discover_ble(seconds=seconds, volcano_only=not show_all)
+        limit = int(req.query["limit"]) if req.query.get("limit") else None
         v: VolcanoBLE = req.app["v"]
+        idx = v.adv_index
+        if idx is not None and idx.running and not idx.stalled:
+            # Antwort aus dem Index; nur solange er noch leer/kalt ist, kurz warten
+            def pred(e: AdvEntry) -> bool:
+                return show_all or _looks_like_volcano(e.name, e.service_uuids)
+            hits = idx.find(pred)
+            if not hits and not idx.warm:
+                hits = await idx.wait_for(pred, max(2, seconds))
+            items = [e.as_dict() for e in (hits[:limit] if limit else hits)]
+            source = "index"
+        else:
+            items = await discover_ble(
+                seconds=seconds, volcano_only=not show_all, adapter=v.adapter,
+                limit=limit,
+            )
+            source = "scan"
         selected = v.mac or None
         for it in items:
             it["selected"] = (
                 selected is not None and it["address"] == selected
             )
         return ok(
-            {"scan_seconds": seconds, "count": len(items), "devices": items}
+            {"scan_seconds": seconds, "count": len(items), "devices": items,
+             "source": source}
         )
     except Exception as e:
         if req.app["devmode"]:
             print("[DEV] /discover Exception:")
             traceback.print_exc()
         log_error("/discover Exception", e)
-        return err(str(e))
+        return fail(e)
+
+
+# Icons sind pro (Wert, Größe, Inhalt) unveränderlich -> ETag + immutable
+ICON_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+def _etag_matches(header: Optional[str], etag: str) -> bool:
+    if not header:
+        return False
+    tags = [t.strip() for t in header.split(",")]
+    # Schwache Vergleichsform (RFC 9110) für If-None-Match
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+
+async def icon_handler(req):
+    """/icon/{value}.png?size=N – Temperatur-Kugel aus dem Speicher."""
+    try:
+        from volcano_icons import PNG_SIZE_MAX, PNG_SIZE_MIN, get_png_icon_async
+        value = int(req.match_info["value"])
+        size = int(req.query.get("size", "64"))
+        if not 0 <= value <= 200:
+            return err("value must be 0..200", 400)
+        if not PNG_SIZE_MIN <= size <= PNG_SIZE_MAX:
+            return err(f"size must be {PNG_SIZE_MIN}..{PNG_SIZE_MAX}", 400)
+        if ICONS is not None:
+            icon = await ICONS.png(value, size)
+        else:
+            icon = await get_png_icon_async(value, size)
+        headers = {"ETag": icon.etag, "Cache-Control": ICON_CACHE_CONTROL}
+        if _etag_matches(req.headers.get("If-None-Match"), icon.etag):
+            return web.Response(status=304, headers=headers)
+        return web.Response(body=icon.data, content_type="image/png", headers=headers)
+    except ValueError:
+        return err("invalid size", 400)
+    except Exception as e:
+        log_error("/icon Exception", e)
+        return fail(e)
+
+
+def _sse_frame(ev: Dict) -> bytes:
+    data = {k: val for k, val in ev.items() if k not in ("id", "kind")}
+    return (
+        f"id: {ev['id']}\nevent: {ev['kind']}\n"
+        f"data: {json.dumps(data, ensure_ascii=False)}\n\n"
+    ).encode()
+
+
+def _snapshot(v: VolcanoBLE) -> Dict:
+    cur, tgt = v.cached_temps()
+    return {"kind": "snapshot", "ts": time.time(), "connection": v.conn_state,
+            "temp": cur, "target": tgt}
+
+
+async def events_handler(req):
+    """/events – Server-Sent Events mit Zustandsänderungen.
+
+    Beim Verbinden kommt ein "snapshot" (ohne id) mit dem Cache-Stand; mit
+    Last-Event-ID werden verpasste Events aus dem Replay-Puffer nachgeliefert.
+    """
+    hub = SSE
+    if hub is None:
+        return err("Event-Stream nicht verfügbar", 503)
+    v: VolcanoBLE = req.app["v"]
+    raw_id = req.headers.get("Last-Event-ID") or req.query.get("last_event_id")
+    last_id = int(raw_id) if raw_id and raw_id.isdigit() else None
+
+    resp = web.StreamResponse(headers={
+        "Content-Type": "text/event-stream",
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no",
+    })
+    await resp.prepare(req)
+    q, backlog, complete = hub.subscribe(last_id)
+    try:
+        await resp.write(f"retry: {SSE_RETRY_MS}\n\n".encode())
+        if last_id is None or not complete:
+            # Neu oder Lücke im Puffer -> aktuellen Stand statt Historie
+            snap = _snapshot(v)
+            await resp.write(
+                f"event: snapshot\ndata: {json.dumps(snap, ensure_ascii=False)}\n\n".encode()
+            )
+        for ev in backlog:
+            await resp.write(_sse_frame(ev))
+        while True:
+            try:
+                ev = await asyncio.wait_for(q.get(), SSE_HEARTBEAT_S)
+            except asyncio.TimeoutError:
+                await resp.write(b": ping\n\n")
+                continue
+            if ev is None:
+                break
+            await resp.write(_sse_frame(ev))
+    except ConnectionResetError:
+        pass
+    finally:
+        hub.unsubscribe(q)
+    return resp
 
 
 def make_app(v: VolcanoBLE, devmode: bool, help_text: str) -> web.Application:
@@ -1120,6 +2994,8 @@ def make_app(v: VolcanoBLE, devmode: bool, help_text: str) -> web.Application:
             web.get("/pump/on", fan_on),
             web.get("/pump/off", fan_off),
             web.get("/discover", discover_handler),
+            web.get("/events", events_handler),
+            web.get(r"/icon/{value:\d+}.png", icon_handler),
             # Dev-Only
             web.get("/settings/snapshot", settings_snapshot),
             web.get("/dev/read", dev_read),
@@ -1127,6 +3003,11 @@ def make_app(v: VolcanoBLE, devmode: bool, help_text: str) -> web.Application:
             web.get("/dev/write/u8", dev_write_u8),
             web.get("/dev/write/u16le", dev_write_u16le),
             web.get("/dev/write/hex", dev_write_hex),
+            web.get("/dev/scheduler", dev_scheduler),
+            web.get("/dev/writemodes", dev_writemodes),
+            web.get("/dev/notify", dev_notify),
+            web.get("/dev/sideeffects", dev_sideeffects),
+            web.get("/dev/events", dev_events),
         ]
     )
     return a
@@ -1134,7 +3015,14 @@ def make_app(v: VolcanoBLE, devmode: bool, help_text: str) -> web.Application:
 
 # ==== Main ====
 async def main_async(args):
+    global TEMP_INDEX
+    global DEFAULT_TEMP
     mac = args.mac or args.addr
+    saved = load_persisted()
+    if isinstance(saved.get("temp_index"), int) and 0 <= saved["temp_index"] < len(TEMP_AVAILABLE):
+        TEMP_INDEX = saved["temp_index"]
+    if isinstance(saved.get("default_temp"), str) and saved["default_temp"].isdigit():
+        DEFAULT_TEMP = saved["default_temp"]
     v = VolcanoBLE(
         mac=mac,
         scan_seconds=args.scan,
@@ -1142,15 +3030,31 @@ async def main_async(args):
         keepalive_interval=args.keepalive_interval,
         preconnect=not args.no_preconnect,
         devmode=args.devmode,
+        state_max_age=args.state_max_age,
+        temp_coalesce_s=args.temp_coalesce_ms / 1000.0,
+        fast_writes=args.fast_writes,
+        adapter=args.adapter or saved.get("adapter"),
+        early_exit=not args.no_early_exit,
+        min_rssi=args.min_rssi,
     )
-
+    # Direkt zur zuletzt funktionierenden Adresse verbinden statt neu zu scannen
+    v._last_addr = saved.get("addr")
+    v.last_target_temp = DEFAULT_TEMP
+
+    global NOTIFIER
+    global NOTIFY_GATE
+    global SIDE_EFFECTS
+    global EVENTS
+    global SSE
+    global ICONS
     runner: Optional[web.AppRunner] = None
+    monitor_task: Optional[asyncio.Task] = None
 
     try:
         # HTTP-Server aufsetzen
         os.system("clear")
 
-        endpoints = ['on','on?temp=180  (Bsp.)','off','pump/on','pump/off','discover']
+        endpoints = ['on','on?temp=180  (Bsp.)','off','pump/on','pump/off','discover','events','icon/180.png?size=64']
 
         help = ""
         help += f"{ts()}Server gestartet  http://{args.host}:{args.port}\n\n\n"
@@ -1162,6 +3066,31 @@ async def main_async(args):
         help += "\n"
         print(help)
 
+        NOTIFIER = await make_notifier(args.notify_backend, args.dbus_address)
+        if NOTIFIER is not None and args.notify_icon == "path":
+            NOTIFIER.supports_image_data = False
+        if NOTIFIER is not None:
+            from volcano_icons import IconService
+            ICONS = IconService()
+            ICONS.start()
+            if NOTIFIER.supports_image_data:
+                # Alle Roh-Icons einmal vorab (Palette: wenige ms, im Executor)
+                await ICONS.prewarm()
+        NOTIFY_GATE = NotifyGate()
+        SIDE_EFFECTS = SideEffects()
+        SIDE_EFFECTS.start()
+        EVENTS = EventBus()
+        EVENTS.add(TerminalSink())
+        EVENTS.add(DesktopSink())
+        if args.webhook:
+            EVENTS.add(WebhookSink(args.webhook))
+        if args.event_log:
+            EVENTS.add(JsonlSink(args.event_log))
+        SSE = EVENTS.add(SseSink())
+        EVENTS.start()
+        if args.devmode:
+            print(f"[DEV] Notification-Backend: {NOTIFIER.name if NOTIFIER else 'keins'}")
+
         app = make_app(v, devmode=args.devmode, help_text=help)
         runner = web.AppRunner(app)
         await runner.setup()
@@ -1170,13 +3099,23 @@ async def main_async(args):
         )
         await site.start()
 
+        # Gemeinsamer Hintergrund-Scanner für /discover und Auto-Scan
+        if not args.no_adv_index:
+            v.adv_index = AdvertIndex(
+                adapter=v.adapter, ttl=args.adv_ttl, devmode=args.devmode
+            )
+            v.adv_index.add_listener(v._on_advert)
+            try:
+                await v.adv_index.start()
+            except Exception as e:
+                log_error("Advertisement-Index konnte nicht starten – nutze Einzel-Scans", e)
+                v.adv_index = None
+
         # BLE initialisieren (mit robustem Preconnect)
         await v.startup()
 
-        # Verbindungs-Monitor
-        asyncio.create_task(
-            monitor_connection(v, interval=args.verbose_interval)
-        )
+        # Verbindungs-Monitor (ereignisgesteuert)
+        monitor_task = asyncio.create_task(monitor_connection(v))
 
         # Hauptloop
         while True:
@@ -1184,6 +3123,12 @@ async def main_async(args):
 
     finally:
         print("['MAIN  : 'Shutdown angefordert, räume auf …")
+        if monitor_task is not None:
+            monitor_task.cancel()
+        # Offene /events-Streams beenden, sonst wartet runner.cleanup() auf sie
+        if SSE is not None:
+            await SSE.close()
+            SSE = None
         # HTTP-Server aufräumen
         if runner is not None:
             try:
@@ -1192,6 +3137,17 @@ async def main_async(args):
                 print(f"[MAIN] Fehler bei runner.cleanup(): {e}")
                 log_error("Fehler bei runner.cleanup()", e)
 
+        # Ausstehende Notifications noch zustellen (solange der Zustand bekannt ist)
+        if SIDE_EFFECTS is not None:
+            await SIDE_EFFECTS.drain()
+            SIDE_EFFECTS = None
+        if EVENTS is not None:
+            await EVENTS.close()
+            EVENTS = None
+
+        if v.adv_index is not None:
+            await v.adv_index.stop()
+
         # BLE sauber trennen
         try:
             await v.shutdown()
@@ -1199,6 +3155,16 @@ async def main_async(args):
             print(f"[MAIN] Fehler bei v.shutdown(): {e}")
             log_error("Fehler bei v.shutdown()", e)
 
+        if NOTIFY_GATE is not None:
+            await NOTIFY_GATE.close()
+            NOTIFY_GATE = None
+        if NOTIFIER is not None:
+            await NOTIFIER.close()
+            NOTIFIER = None
+        if ICONS is not None:
+            ICONS.close()
+            ICONS = None
+
 
 def highlander(sig=2, wait=10.0):
     import os, time
@@ -1226,6 +3192,12 @@ if __name__ == "__main__":
         default=None,
         help="(Alias) MAC-Adresse – deprecated, verwende --mac",
     )
+    p.add_argument(
+        "--adapter",
+        type=str,
+        default=None,
+        help="Bluetooth-Adapter, z.B. hci0 (default: zuletzt genutzter bzw. System-Default)",
+    )
     p.add_argument(
         "--host",
         type=str,
@@ -1244,6 +3216,28 @@ if __name__ == "__main__":
         default=6,
         help="Scan-Dauer (Sekunden)",
     )
+    p.add_argument(
+        "--no-early-exit",
+        action="store_true",
+        help="Scan immer volle --scan Sekunden laufen lassen",
+    )
+    p.add_argument(
+        "--min-rssi",
+        type=int,
+        default=SCAN_MIN_RSSI,
+        help=f"Mindest-RSSI für vorzeitiges Scan-Ende (default: {SCAN_MIN_RSSI})",
+    )
+    p.add_argument(
+        "--no-adv-index",
+        action="store_true",
+        help="Keinen dauerhaften Hintergrund-Scanner betreiben (Einzel-Scans)",
+    )
+    p.add_argument(
+        "--adv-ttl",
+        type=float,
+        default=ADV_TTL_S,
+        help=f"Sekunden, bis ungesehene Geräte aus dem Index fallen (default: {ADV_TTL_S:g})",
+    )
     p.add_argument(
         "--no-keepalive",
         action="store_true",
@@ -1255,6 +3249,23 @@ if __name__ == "__main__":
         default=20,
         help="Sekunden zwischen Keep-Alive-Reads",
     )
+    p.add_argument(
+        "--state-max-age",
+        type=float,
+        default=STATE_MAX_AGE,
+        help="Max. Alter gecachter Temperaturen ohne Notify-Abo (Sekunden)",
+    )
+    p.add_argument(
+        "--temp-coalesce-ms",
+        type=int,
+        default=int(TEMP_COALESCE_S * 1000),
+        help="Fenster für gebündelte Zieltemperatur-Writes in ms (0 = aus)",
+    )
+    p.add_argument(
+        "--fast-writes",
+        action="store_true",
+        help="Zieltemperatur ohne Response schreiben, per Notify/Read bestätigen",
+    )
     p.add_argument(
         "--no-preconnect",
         action="store_true",
@@ -1269,7 +3280,37 @@ if __name__ == "__main__":
         "--verbose-interval",
         type=int,
         default=5,
-        help="Intervall in Sekunden für --verbose (default: 5)",
+        help="(ohne Funktion – der Monitor reagiert auf Verbindungs-Events)",
+    )
+    p.add_argument(
+        "--notify-backend",
+        choices=("auto", "dbus", "notify-send", "none"),
+        default="auto",
+        help="Desktop-Notifications: D-Bus, notify-send oder keine (default: auto)",
+    )
+    p.add_argument(
+        "--notify-icon",
+        choices=("image", "path"),
+        default="image",
+        help="Icon bei D-Bus roh als image-data senden oder als Dateipfad (default: image)",
+    )
+    p.add_argument(
+        "--dbus-address",
+        type=str,
+        default=None,
+        help="D-Bus-Adresse für Notifications (default: Session-Bus)",
+    )
+    p.add_argument(
+        "--webhook",
+        type=str,
+        default=None,
+        help="URL, an die Zustands-Events als JSON gePOSTet werden",
+    )
+    p.add_argument(
+        "--event-log",
+        type=str,
+        default=None,
+        help="Datei, an die Zustands-Events als JSON-Zeilen angehängt werden",
     )
     p.add_argument(
         "--devmode",
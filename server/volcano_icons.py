@@ -5,17 +5,34 @@ volcano_icons.py
 - Intended for use as --icon argument to notify-send (or other notification systems).
 
 Requires: Pillow (pip install pillow)
+Optional: NumPy (pip install numpy) for vectorized gradient rendering.
 """
 
 from __future__ import annotations
 
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
+import asyncio
+import hashlib
+import io
+import json
 import math
 import os
-from typing import Tuple
+import shutil
+import tempfile
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
 
-from PIL import Image, ImageDraw, ImageFilter
+from PIL import Image, ImageChops, ImageDraw, ImageFilter
+
+try:
+    import numpy as np
+except ImportError:  # optional: falls back to the pure-Python gradient
+    np = None
 
 
 RGB = Tuple[int, int, int]
@@ -35,6 +52,20 @@ ANCHORS = [
 ]
 
 
+# Bump when rendering code changes in a way the parameters below don't capture.
+ICON_CACHE_VERSION = 2
+
+# Gloss parameters (all part of the cache fingerprint)
+DEFAULT_PAD = 3
+SHADOW_OFFSET = (2, 3)
+SHADOW_RGBA = (0, 0, 0, 70)
+SHADOW_BLUR = 3
+RIM_GRADIENT = ((255, 255, 255, 10), (0, 0, 0, 90), (0.50, 0.55))           # inner, outer, focus
+HIGHLIGHT_GRADIENT = ((255, 255, 255, 140), (255, 255, 255, 0), (0.30, 0.25))
+HIGHLIGHT_CLIP = (6, 4, 6)   # inset x, inset top, extra below the middle
+BORDER_RGBA = (0, 0, 0, 60)
+
+
 def _clamp(v: float, lo: float, hi: float) -> float:
     return lo if v < lo else hi if v > hi else v
 
@@ -70,11 +101,8 @@ def value_to_rgb(value: float) -> RGB:
     return ANCHORS[-1].rgb
 
 
-def _radial_gradient(size: int, inner: Tuple[int, int, int, int], outer: Tuple[int, int, int, int], focus=(0.35, 0.30)) -> Image.Image:
-    """
-    Creates an RGBA radial gradient image.
-    focus: relative center of gradient (0..1, 0..1) where highlight is strongest.
-    """
+def _radial_gradient_python(size: int, inner: Tuple[int, int, int, int], outer: Tuple[int, int, int, int], focus=(0.35, 0.30)) -> Image.Image:
+    """Reference implementation: one pixel at a time."""
     img = Image.new("RGBA", (size, size), (0, 0, 0, 0))
     cx = focus[0] * size
     cy = focus[1] * size
@@ -96,75 +124,268 @@ def _radial_gradient(size: int, inner: Tuple[int, int, int, int], outer: Tuple[i
     return img
 
 
-def make_glossy_ball_icon(value: float, size: int = 64, pad: int = 3) -> Image.Image:
+def _radial_gradient_numpy(size: int, inner: Tuple[int, int, int, int], outer: Tuple[int, int, int, int], focus=(0.35, 0.30)) -> Image.Image:
+    """Same math as the reference, evaluated on whole float64 arrays."""
+    cx = focus[0] * size
+    cy = focus[1] * size
+    max_r = math.hypot(max(cx, size - cx), max(cy, size - cy))
+
+    ys, xs = np.mgrid[0:size, 0:size].astype(np.float64)
+    r = np.clip(np.hypot(xs - cx, ys - cy) / max_r, 0.0, 1.0)
+    t = (r * r * (3 - 2 * r))[..., None]
+    a = np.asarray(inner, dtype=np.float64)
+    b = np.asarray(outer, dtype=np.float64)
+    # int() truncates; all channel values are >= 0, so trunc == floor
+    out = np.trunc(a + (b - a) * t).astype(np.uint8)
+    return Image.fromarray(out, "RGBA")
+
+
+GRADIENT_IMPLS = ("auto", "python", "numpy")
+
+
+def _radial_gradient(size: int, inner: Tuple[int, int, int, int], outer: Tuple[int, int, int, int], focus=(0.35, 0.30), impl: str = "auto") -> Image.Image:
     """
-    Returns a glossy circular icon (RGBA).
-    Gloss effect is achieved via:
-      - subtle drop shadow
-      - inner rim shading
-      - specular highlight (radial gradient overlay)
+    Creates an RGBA radial gradient image.
+    focus: relative center of gradient (0..1, 0..1) where highlight is strongest.
+    impl: "numpy", "python" or "auto" (NumPy if installed).
     """
-    rgb = value_to_rgb(value)
+    if impl not in GRADIENT_IMPLS:
+        raise ValueError(f"unknown gradient impl: {impl!r}")
+    if impl == "numpy" and np is None:
+        raise RuntimeError("impl='numpy' requires NumPy")
+    if impl == "python" or np is None:
+        return _radial_gradient_python(size, inner, outer, focus)
+    return _radial_gradient_numpy(size, inner, outer, focus)
 
-    # Base canvas
-    img = Image.new("RGBA", (size, size), (0, 0, 0, 0))
+
+def bench_radial_gradient(size: int = 64, repeat: int = 20) -> Dict[str, float]:
+    """
+    Times each available gradient implementation (ms per call, highlight
+    gradient) and reports the largest per-channel difference between them
+    over both gradients an icon uses.
+    """
+    gradients = [RIM_GRADIENT, HIGHLIGHT_GRADIENT]
+    impls = ["python"] + (["numpy"] if np is not None else [])
+    results: Dict[str, float] = {}
+    inner, outer, focus = HIGHLIGHT_GRADIENT
+    for impl in impls:
+        t0 = time.perf_counter()
+        for _ in range(repeat):
+            _radial_gradient(size, inner, outer, focus, impl=impl)
+        results[impl] = (time.perf_counter() - t0) * 1000.0 / repeat
+    if "numpy" in impls:
+        diff = 0
+        for inner, outer, focus in gradients:
+            ref = _radial_gradient(size, inner, outer, focus, impl="python").tobytes()
+            got = _radial_gradient(size, inner, outer, focus, impl="numpy").tobytes()
+            diff = max(diff, max(abs(x - y) for x, y in zip(ref, got)))
+        results["max_channel_diff"] = float(diff)
+    return results
+
+
+@dataclass(frozen=True)
+class BallLayers:
+    """Value-independent layers for one (size, pad); treat as read-only."""
+    base: Image.Image        # transparent canvas with the drop shadow
+    mask: Image.Image        # "L" ball shape
+    rim: Image.Image         # rim shading, already masked to the ball
+    highlight: Image.Image   # specular highlight, clipped and masked
+
+
+@lru_cache(maxsize=8)
+def _ball_layers(size: int, pad: int) -> BallLayers:
+    clear = Image.new("RGBA", (size, size), (0, 0, 0, 0))
+    empty_l = Image.new("L", (size, size), 0)
 
     # Drop shadow (very subtle)
-    shadow = Image.new("RGBA", (size, size), (0, 0, 0, 0))
+    base = clear.copy()
+    shadow = clear.copy()
     sd = ImageDraw.Draw(shadow)
-    sd.ellipse((pad + 2, pad + 3, size - pad + 2, size - pad + 3), fill=(0, 0, 0, 70))
-    shadow = shadow.filter(ImageFilter.GaussianBlur(radius=3))
-    img.alpha_composite(shadow)
-
-    # Ball base
-    ball = Image.new("RGBA", (size, size), (0, 0, 0, 0))
-    d = ImageDraw.Draw(ball)
-    d.ellipse((pad, pad, size - pad, size - pad), fill=(*rgb, 255))
+    dx, dy = SHADOW_OFFSET
+    sd.ellipse((pad + dx, pad + dy, size - pad + dx, size - pad + dy), fill=SHADOW_RGBA)
+    shadow = shadow.filter(ImageFilter.GaussianBlur(radius=SHADOW_BLUR))
+    base.alpha_composite(shadow)
 
     # Inner rim shading (gives depth, "button" look)
-    rim = _radial_gradient(
-        size,
-        inner=(255, 255, 255, 10),
-        outer=(0, 0, 0, 90),
-        focus=(0.50, 0.55),
-    )
+    inner, outer, focus = RIM_GRADIENT
+    rim = _radial_gradient(size, inner=inner, outer=outer, focus=focus)
     # Mask rim to ball shape only
     mask = Image.new("L", (size, size), 0)
     md = ImageDraw.Draw(mask)
     md.ellipse((pad, pad, size - pad, size - pad), fill=255)
-    rim.putalpha(Image.composite(rim.split()[-1], Image.new("L", (size, size), 0), mask))
-    ball = Image.alpha_composite(ball, Image.composite(rim, Image.new("RGBA", (size, size), (0,0,0,0)), mask))
+    rim.putalpha(Image.composite(rim.split()[-1], empty_l, mask))
+    rim = Image.composite(rim, clear, mask)
 
     # Specular highlight (gloss)
-    highlight = _radial_gradient(
-        size,
-        inner=(255, 255, 255, 140),
-        outer=(255, 255, 255, 0),
-        focus=(0.30, 0.25),
-    )
+    inner, outer, focus = HIGHLIGHT_GRADIENT
+    highlight = _radial_gradient(size, inner=inner, outer=outer, focus=focus)
     # Restrict highlight to upper portion for a "button" sheen
     clip = Image.new("L", (size, size), 0)
     cd = ImageDraw.Draw(clip)
-    cd.ellipse((pad + 6, pad + 4, size - pad - 6, size // 2 + 6), fill=255)
-    highlight.putalpha(Image.composite(highlight.split()[-1], Image.new("L", (size, size), 0), clip))
-    ball = Image.alpha_composite(ball, Image.composite(highlight, Image.new("RGBA", (size, size), (0,0,0,0)), mask))
+    ix, itop, below = HIGHLIGHT_CLIP
+    cd.ellipse((pad + ix, pad + itop, size - pad - ix, size // 2 + below), fill=255)
+    highlight.putalpha(Image.composite(highlight.split()[-1], empty_l, clip))
+    highlight = Image.composite(highlight, clear, mask)
+
+    return BallLayers(base=base, mask=mask, rim=rim, highlight=highlight)
+
+
+def _render_ball(rgb: RGB, size: int, pad: int) -> Image.Image:
+    layers = _ball_layers(size, pad)
+
+    # Ball base
+    ball = Image.new("RGBA", (size, size), (0, 0, 0, 0))
+    d = ImageDraw.Draw(ball)
+    d.ellipse((pad, pad, size - pad, size - pad), fill=(*rgb, 255))
+    ball = Image.alpha_composite(ball, layers.rim)
+    ball = Image.alpha_composite(ball, layers.highlight)
 
     # Subtle border (optional; very light)
     d = ImageDraw.Draw(ball)
-    d.ellipse((pad, pad, size - pad, size - pad), outline=(0, 0, 0, 60), width=1)
+    d.ellipse((pad, pad, size - pad, size - pad), outline=BORDER_RGBA, width=1)
 
+    img = layers.base.copy()
     img.alpha_composite(ball)
     return img
 
 
-def default_cache_dir(app_name: str = "volcano", size: int = 64) -> Path:
+@dataclass(frozen=True)
+class PaletteTemplate:
+    """Per-pixel affine colour map: out = offset + fill * scale / 255."""
+    offset: Image.Image   # RGB, render with a black fill
+    scale: Image.Image    # RGB, white render minus black render
+    alpha: Image.Image    # L, identical for every fill
+
+
+@lru_cache(maxsize=8)
+def _palette_template(size: int, pad: int) -> PaletteTemplate:
+    black = _render_ball((0, 0, 0), size, pad)
+    white = _render_ball((255, 255, 255), size, pad)
+    offset = black.convert("RGB")
+    # Compositing is monotonic in the fill colour, so white >= black per channel.
+    # Pixels outside the ball (shadow) and the border do not depend on the
+    # fill and get scale 0.
+    scale = ImageChops.subtract(white.convert("RGB"), offset)
+    return PaletteTemplate(offset=offset, scale=scale, alpha=black.getchannel("A"))
+
+
+def _render_ball_palette(rgb: RGB, size: int, pad: int) -> Image.Image:
+    tpl = _palette_template(size, pad)
+    tint = ImageChops.multiply(tpl.scale, Image.new("RGB", (size, size), rgb))
+    img = ImageChops.add(tpl.offset, tint)
+    img.putalpha(tpl.alpha)
+    return img
+
+
+RENDERERS = ("pipeline", "palette")
+
+
+def make_glossy_ball_icon(value: float, size: int = 64, pad: int = DEFAULT_PAD, renderer: str = "pipeline") -> Image.Image:
+    """
+    Returns a glossy circular icon (RGBA).
+    Gloss effect is achieved via:
+      - subtle drop shadow
+      - inner rim shading
+      - specular highlight (radial gradient overlay)
+    Only the base fill depends on `value`; the other layers are built once
+    per (size, pad) by _ball_layers().
+
+    renderer="palette" tints a per-size template instead of compositing
+    (deterministic; differs from "pipeline" by rounding, at most 2 per
+    channel over all values at 32..256 px).
+    """
+    if renderer not in RENDERERS:
+        raise ValueError(f"unknown renderer: {renderer!r}")
+    rgb = value_to_rgb(value)
+    if renderer == "palette":
+        return _render_ball_palette(rgb, size, pad)
+    return _render_ball(rgb, size, pad)
+
+
+def bench_ball_icon(size: int = 64, repeat: int = 20) -> Dict[str, float]:
+    """Times icon rendering (ms per icon) with cold and warm layer caches."""
+    results: Dict[str, float] = {}
+    _ball_layers.cache_clear()
+    _palette_template.cache_clear()
+    for renderer in RENDERERS:
+        t0 = time.perf_counter()
+        make_glossy_ball_icon(100, size=size, renderer=renderer)
+        results[f"{renderer}_cold"] = (time.perf_counter() - t0) * 1000.0
+        t0 = time.perf_counter()
+        for i in range(repeat):
+            make_glossy_ball_icon(i * 200 // max(1, repeat - 1), size=size, renderer=renderer)
+        results[f"{renderer}_warm"] = (time.perf_counter() - t0) * 1000.0 / repeat
+    diff = 0
+    for v in range(0, 201, 10):
+        a = make_glossy_ball_icon(v, size=size).tobytes()
+        b = make_glossy_ball_icon(v, size=size, renderer="palette").tobytes()
+        diff = max(diff, max(abs(x - y) for x, y in zip(a, b)))
+    results["palette_max_diff"] = float(diff)
+    return results
+
+
+@lru_cache(maxsize=32)
+def render_fingerprint(size: int = 64, pad: int = DEFAULT_PAD, renderer: str = "pipeline") -> str:
+    """Short hash over every input that affects the rendered pixels."""
+    params = {
+        "version": ICON_CACHE_VERSION,
+        "anchors": [(a.value, a.rgb) for a in ANCHORS],
+        "size": size,
+        "pad": pad,
+        "renderer": renderer,
+        "shadow": (SHADOW_OFFSET, SHADOW_RGBA, SHADOW_BLUR),
+        "rim": RIM_GRADIENT,
+        "highlight": (HIGHLIGHT_GRADIENT, HIGHLIGHT_CLIP),
+        "border": BORDER_RGBA,
+    }
+    blob = json.dumps(params, sort_keys=True).encode()
+    return hashlib.sha256(blob).hexdigest()[:12]
+
+
+# Other generations of the same size kept besides the current one
+GC_KEEP = 1
+
+
+def default_cache_dir(app_name: str = "volcano", size: int = 64, renderer: str = "pipeline") -> Path:
     base = Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache"))
-    return base / app_name / f"icons_{size}"
+    return base / app_name / f"icons_{size}_{render_fingerprint(size, renderer=renderer)}"
+
+
+def gc_icon_cache(current: Path, size: int, keep: int = GC_KEEP) -> List[Path]:
+    """
+    Removes old generations of `size` next to `current`.
+    Legacy unversioned dirs (icons_<size>) always go; of the other
+    fingerprinted ones the `keep` with the newest mtime survive.
+    ensure_icon_cache() touches a generation whenever it is opened,
+    so mtime approximates last use, not just last write.
+    """
+    parent = current.parent
+    legacy = parent / f"icons_{size}"
+    others = [
+        d for d in parent.glob(f"icons_{size}_*")
+        if d.is_dir() and d != current
+    ]
+    others.sort(key=lambda d: d.stat().st_mtime, reverse=True)
+    doomed = others[keep:]
+    if legacy.is_dir() and legacy != current:
+        doomed.append(legacy)
+    for d in doomed:
+        shutil.rmtree(d, ignore_errors=True)
+    return doomed
 
 
 def ensure_icon_cache(cache_dir: Path | None = None, size: int = 64) -> Path:
     cache_dir = cache_dir or default_cache_dir(size=size)
-    cache_dir.mkdir(parents=True, exist_ok=True)
+    if not cache_dir.is_dir():
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        if cache_dir.name.startswith(f"icons_{size}_"):
+            # New generation: parameters changed (or first run)
+            gc_icon_cache(cache_dir, size)
+    else:
+        try:
+            os.utime(cache_dir)
+        except OSError:
+            pass
     return cache_dir
 
 
@@ -173,33 +394,463 @@ def icon_path_for_value(value: int, cache_dir: Path, size: int = 64) -> Path:
     return cache_dir / f"ball_{v:03d}.png"
 
 
-def build_cache_0_200(cache_dir: Path | None = None, size: int = 64, overwrite: bool = False) -> Path:
-    cache_dir = ensure_icon_cache(cache_dir=cache_dir, size=size)
-    for v in range(0, 201):
-        p = icon_path_for_value(v, cache_dir, size=size)
+def _atomic_write(data: bytes, p: Path) -> None:
+    """Write via temp file + rename so readers never see a partial file."""
+    fd, tmp = tempfile.mkstemp(dir=p.parent, prefix=f".{p.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, p)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+def _store_icon(img: Image.Image, p: Path) -> None:
+    """Encodes `img` as PNG and writes it atomically to `p`."""
+    buf = io.BytesIO()
+    img.save(buf, "PNG")
+    _atomic_write(buf.getvalue(), p)
+
+
+def cache_stats(cache_dir: Path) -> Dict[str, int]:
+    """Icon files and their total bytes."""
+    icons = list(cache_dir.glob("ball_*.png"))
+    return {
+        "icons": len(icons),
+        "bytes": sum(i.stat().st_size for i in icons),
+    }
+
+
+def _render_values(cache_dir: str, size: int, values: List[int], overwrite: bool, renderer: str) -> int:
+    """Worker: render `values` into `cache_dir`; returns number of files written."""
+    d = Path(cache_dir)
+    written = 0
+    for v in values:
+        p = icon_path_for_value(v, d, size=size)
         if p.exists() and not overwrite:
             continue
-        img = make_glossy_ball_icon(v, size=size)
-        img.save(p, "PNG")
+        _store_icon(make_glossy_ball_icon(v, size=size, renderer=renderer), p)
+        written += 1
+    return written
+
+
+def build_cache_0_200(cache_dir: Path | None = None, size: int = 64, overwrite: bool = False, renderer: str = "pipeline") -> Path:
+    cache_dir = ensure_icon_cache(cache_dir=cache_dir, size=size)
+    _render_values(str(cache_dir), size, list(range(0, 201)), overwrite, renderer)
     return cache_dir
 
 
-def get_cached_icon(value: int, cache_dir: Path | None = None, size: int = 64) -> str:
+@dataclass
+class BuildResult:
+    size: int
+    cache_dir: Path
+    written: int
+    seconds: float
+
+
+def build_cache_parallel(
+    sizes: Iterable[int] = (64,),
+    values: Iterable[int] = range(0, 201),
+    jobs: Optional[int] = None,
+    overwrite: bool = False,
+    renderer: str = "pipeline",
+) -> List[BuildResult]:
     """
-    Returns a filesystem path to a cached icon for `value` (0..200).
-    Generates the full cache on first use if needed.
+    Renders `values` for every size across a process pool.
+    Each size is split into chunks so every worker keeps its per-size
+    layers warm; sizes are built one after another for per-size timing.
     """
-    cache_dir = ensure_icon_cache(cache_dir=cache_dir, size=size)
-    p = icon_path_for_value(value, cache_dir, size=size)
+    jobs = jobs or os.cpu_count() or 1
+    values = sorted({int(_clamp(v, 0, 200)) for v in values})
+    results: List[BuildResult] = []
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        for size in sizes:
+            cache_dir = ensure_icon_cache(default_cache_dir(size=size, renderer=renderer), size=size)
+            n_chunks = max(1, min(len(values), jobs * 4))
+            chunks = [values[i::n_chunks] for i in range(n_chunks)]
+            t0 = time.perf_counter()
+            futs = [
+                pool.submit(_render_values, str(cache_dir), size, c, overwrite, renderer)
+                for c in chunks if c
+            ]
+            written = sum(f.result() for f in as_completed(futs))
+            results.append(BuildResult(size, cache_dir, written, time.perf_counter() - t0))
+    return results
+
+
+# ---- in-process lookup cache ------------------------------------------------
+# Steady state: (value, size, cache_dir) -> path without touching the filesystem.
+
+PATH_CACHE_MAX = 1024
+
+_path_cache: "OrderedDict[Tuple[int, int, str], str]" = OrderedDict()
+_path_lock = threading.Lock()
+_inflight: Dict[Tuple[int, int, str], "asyncio.Future[str]"] = {}
+_render_pool: Optional[ThreadPoolExecutor] = None
+
+
+def _icon_key(value: int, cache_dir: Path | None, size: int) -> Tuple[int, int, str]:
+    d = cache_dir or default_cache_dir(size=size)
+    return (int(_clamp(value, 0, 200)), size, str(d))
+
+
+def _path_cache_get(key: Tuple[int, int, str]) -> Optional[str]:
+    with _path_lock:
+        p = _path_cache.get(key)
+        if p is not None:
+            _path_cache.move_to_end(key)
+        return p
+
+
+def _path_cache_put(key: Tuple[int, int, str], path: str) -> None:
+    with _path_lock:
+        _path_cache[key] = path
+        _path_cache.move_to_end(key)
+        while len(_path_cache) > PATH_CACHE_MAX:
+            _path_cache.popitem(last=False)
+
+
+def clear_path_cache() -> None:
+    with _path_lock:
+        _path_cache.clear()
+
+
+def _resolve_icon(key: Tuple[int, int, str]) -> str:
+    value, size, cache_dir = key
+    d = ensure_icon_cache(cache_dir=Path(cache_dir), size=size)
+    p = icon_path_for_value(value, d, size=size)
 
     # If not present, lazily build only this one (fast path)
     if not p.exists():
-        img = make_glossy_ball_icon(value, size=size)
-        img.save(p, "PNG")
-    return str(p)
+        _store_icon(make_glossy_ball_icon(value, size=size), p)
+    path = str(p)
+    _path_cache_put(key, path)
+    return path
+
+
+def get_cached_icon(value: int, cache_dir: Path | None = None, size: int = 64) -> str:
+    """
+    Returns a filesystem path to a cached icon for `value` (0..200).
+    Renders the icon on first use if needed (blocking).
+    """
+    key = _icon_key(value, cache_dir, size)
+    return _path_cache_get(key) or _resolve_icon(key)
+
+
+async def get_cached_icon_async(value: int, cache_dir: Path | None = None, size: int = 64) -> str:
+    """
+    Like get_cached_icon(), but misses render in a worker thread.
+    Concurrent misses for the same key share one render.
+    """
+    global _render_pool
+    key = _icon_key(value, cache_dir, size)
+    hit = _path_cache_get(key)
+    if hit is not None:
+        return hit
+    fut = _inflight.get(key)
+    if fut is None:
+        if _render_pool is None:
+            _render_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="icons")
+        fut = asyncio.get_running_loop().run_in_executor(_render_pool, _resolve_icon, key)
+        _inflight[key] = fut
+        fut.add_done_callback(lambda _f, k=key: _inflight.pop(k, None))
+    # shield: a cancelled caller must not cancel the shared render
+    return await asyncio.shield(fut)
+
+
+# ---- raw RGBA icons ----------------------------------------------------------
+# For the freedesktop "image-data" hint: no PNG encode, no file, no decode.
+
+# In-memory icons (raw + HTTP PNG) use the palette renderer: all 201 values
+# of a size render in a few ms. The on-disk cache keeps the pipeline look.
+MEMORY_RENDERER = "palette"
+
+
+@dataclass(frozen=True)
+class RawIcon:
+    """Unpremultiplied RGBA, 8 bits per sample; `data` is a read-only view."""
+    width: int
+    height: int
+    rowstride: int
+    data: memoryview
+    has_alpha: bool = True
+    bits_per_sample: int = 8
+    channels: int = 4
+
+    def image_data(self) -> tuple:
+        """Value for the image-data hint, signature (iiibiiay)."""
+        # .obj is the underlying bytes object: handed over without a copy
+        return (self.width, self.height, self.rowstride, self.has_alpha,
+                self.bits_per_sample, self.channels, self.data.obj)
+
+
+_raw_cache: Dict[Tuple[int, int, str], RawIcon] = {}
+_raw_lock = threading.Lock()
+_raw_inflight: Dict[Tuple[int, int, str], "asyncio.Future[RawIcon]"] = {}
+
+
+def get_raw_icon(value: int, size: int = 64, renderer: str = MEMORY_RENDERER) -> RawIcon:
+    """Raw RGBA icon for `value`; rendered once per (value, size, renderer), then shared."""
+    key = (int(_clamp(value, 0, 200)), size, renderer)
+    with _raw_lock:
+        hit = _raw_cache.get(key)
+    if hit is not None:
+        return hit
+    img = make_glossy_ball_icon(key[0], size=size, renderer=renderer)
+    raw = RawIcon(width=img.width, height=img.height, rowstride=img.width * 4,
+                  data=memoryview(img.tobytes()))
+    with _raw_lock:
+        return _raw_cache.setdefault(key, raw)
+
+
+async def get_raw_icon_async(value: int, size: int = 64, renderer: str = MEMORY_RENDERER) -> RawIcon:
+    """Like get_raw_icon(), misses render in a worker thread (single-flight)."""
+    global _render_pool
+    key = (int(_clamp(value, 0, 200)), size, renderer)
+    with _raw_lock:
+        hit = _raw_cache.get(key)
+    if hit is not None:
+        return hit
+    fut = _raw_inflight.get(key)
+    if fut is None:
+        if _render_pool is None:
+            _render_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="icons")
+        fut = asyncio.get_running_loop().run_in_executor(_render_pool, get_raw_icon, *key)
+        _raw_inflight[key] = fut
+        fut.add_done_callback(lambda _f, k=key: _raw_inflight.pop(k, None))
+    return await asyncio.shield(fut)
+
+
+# ---- in-memory PNGs (HTTP) ---------------------------------------------------
+
+# Sizes served over HTTP (bounds memory per client-chosen size)
+PNG_SIZE_MIN = 16
+PNG_SIZE_MAX = 256
+PNG_CACHE_MAX = 512
+
+
+@dataclass(frozen=True)
+class PngIcon:
+    data: bytes
+    etag: str   # strong, quoted: "<sha256 prefix>"
+
+
+_png_cache: "OrderedDict[Tuple[int, int, str], PngIcon]" = OrderedDict()
+_png_lock = threading.Lock()
+_png_inflight: Dict[Tuple[int, int, str], "asyncio.Future[PngIcon]"] = {}
+
+
+def get_png_icon(value: int, size: int = 64, renderer: str = MEMORY_RENDERER) -> PngIcon:
+    """Encoded PNG + ETag for `value`; encoded once per (value, size, renderer)."""
+    if not PNG_SIZE_MIN <= size <= PNG_SIZE_MAX:
+        raise ValueError(f"size must be {PNG_SIZE_MIN}..{PNG_SIZE_MAX}")
+    key = (int(_clamp(value, 0, 200)), size, renderer)
+    with _png_lock:
+        hit = _png_cache.get(key)
+        if hit is not None:
+            _png_cache.move_to_end(key)
+            return hit
+    buf = io.BytesIO()
+    make_glossy_ball_icon(key[0], size=size, renderer=renderer).save(buf, "PNG")
+    data = buf.getvalue()
+    icon = PngIcon(data=data, etag=f'"{hashlib.sha256(data).hexdigest()[:32]}"')
+    with _png_lock:
+        _png_cache[key] = icon
+        while len(_png_cache) > PNG_CACHE_MAX:
+            _png_cache.popitem(last=False)
+    return icon
+
+
+async def get_png_icon_async(value: int, size: int = 64, renderer: str = MEMORY_RENDERER) -> PngIcon:
+    """Like get_png_icon(), misses encode in a worker thread (single-flight)."""
+    global _render_pool
+    if not PNG_SIZE_MIN <= size <= PNG_SIZE_MAX:
+        raise ValueError(f"size must be {PNG_SIZE_MIN}..{PNG_SIZE_MAX}")
+    key = (int(_clamp(value, 0, 200)), size, renderer)
+    with _png_lock:
+        hit = _png_cache.get(key)
+        if hit is not None:
+            _png_cache.move_to_end(key)
+    if hit is not None:
+        return hit
+    fut = _png_inflight.get(key)
+    if fut is None:
+        if _render_pool is None:
+            _render_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="icons")
+        fut = asyncio.get_running_loop().run_in_executor(_render_pool, get_png_icon, *key)
+        _png_inflight[key] = fut
+        fut.add_done_callback(lambda _f, k=key: _png_inflight.pop(k, None))
+    return await asyncio.shield(fut)
+
+
+# ---- icon service ------------------------------------------------------------
+
+# Files kept in the temp area at most (oldest evicted first)
+TEMP_ICONS_MAX = 32
+# Leftovers of the old per-notification mkstemp icons
+LEGACY_TEMP_GLOB = "volcano_ball_*.png"
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class IconService:
+    """
+    Single source of notification icons.
+
+    raw() returns in-memory RGBA for backends that take image-data,
+    png() encoded bytes + ETag for HTTP; both use `renderer` (palette by
+    default) and prewarm() fills the raw cache for all values at startup.
+    path() serves from the persistent cache; if that is not writable,
+    icons go to a per-process temp area that never holds more than
+    `temp_max` files and is removed on close(). start() removes temp
+    areas of dead processes and legacy mkstemp icons.
+    """
+
+    def __init__(self, size: int = 64, cache_dir: Path | None = None,
+                 temp_root: Path | None = None, temp_max: int = TEMP_ICONS_MAX,
+                 renderer: str = MEMORY_RENDERER):
+        self.size = size
+        self.renderer = renderer
+        self.cache_dir = cache_dir
+        self.temp_root = temp_root or Path(tempfile.gettempdir()) / f"volcano_icons-{os.getuid()}"
+        self.temp_dir = self.temp_root / str(os.getpid())
+        self.temp_max = temp_max
+        self._temp: "OrderedDict[int, Path]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"raw": 0, "png": 0, "cache": 0, "temp": 0, "evicted": 0}
+
+    def start(self) -> None:
+        self.cleanup_stale()
+        self.temp_dir.mkdir(parents=True, exist_ok=True)
+
+    def cleanup_stale(self) -> int:
+        removed = 0
+        for p in Path(tempfile.gettempdir()).glob(LEGACY_TEMP_GLOB):
+            try:
+                if p.stat().st_uid == os.getuid():
+                    p.unlink()
+                    removed += 1
+            except OSError:
+                pass
+        if self.temp_root.is_dir():
+            for d in self.temp_root.iterdir():
+                if d.is_dir() and d.name.isdigit() and not _pid_alive(int(d.name)):
+                    shutil.rmtree(d, ignore_errors=True)
+                    removed += 1
+        return removed
+
+    async def path(self, value: int) -> str:
+        try:
+            p = await get_cached_icon_async(value, cache_dir=self.cache_dir, size=self.size)
+            self.stats["cache"] += 1
+            return p
+        except OSError:
+            pass
+        loop = asyncio.get_running_loop()
+        p = await loop.run_in_executor(None, self._temp_icon, int(_clamp(value, 0, 200)))
+        self.stats["temp"] += 1
+        return str(p)
+
+    async def raw(self, value: int) -> RawIcon:
+        self.stats["raw"] += 1
+        return await get_raw_icon_async(value, size=self.size, renderer=self.renderer)
+
+    async def png(self, value: int, size: int | None = None) -> PngIcon:
+        self.stats["png"] += 1
+        return await get_png_icon_async(value, size=size or self.size, renderer=self.renderer)
+
+    async def prewarm(self) -> float:
+        """Renders all raw icons of this size off-loop; returns ms taken."""
+        def _all() -> float:
+            t0 = time.perf_counter()
+            for v in range(0, 201):
+                get_raw_icon(v, size=self.size, renderer=self.renderer)
+            return (time.perf_counter() - t0) * 1000.0
+        return await asyncio.get_running_loop().run_in_executor(None, _all)
+
+    def _temp_icon(self, value: int) -> Path:
+        with self._lock:
+            return self._temp_icon_locked(value)
+
+    def _temp_icon_locked(self, value: int) -> Path:
+        p = self._temp.get(value)
+        if p is not None and p.exists():
+            self._temp.move_to_end(value)
+            return p
+        self.temp_dir.mkdir(parents=True, exist_ok=True)
+        p = self.temp_dir / f"ball_{value:03d}.png"
+        buf = io.BytesIO()
+        make_glossy_ball_icon(value, size=self.size).save(buf, "PNG")
+        _atomic_write(buf.getvalue(), p)
+        self._temp[value] = p
+        while len(self._temp) > self.temp_max:
+            _, old = self._temp.popitem(last=False)
+            old.unlink(missing_ok=True)
+            self.stats["evicted"] += 1
+        return p
+
+    def temp_files(self) -> int:
+        return sum(1 for _ in self.temp_dir.glob("*")) if self.temp_dir.is_dir() else 0
+
+    def metrics(self) -> Dict[str, int]:
+        return {**self.stats, "temp_files": self.temp_files(), "temp_max": self.temp_max}
+
+    def close(self) -> None:
+        self._temp.clear()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+        try:
+            self.temp_root.rmdir()
+        except OSError:
+            pass
+
+
+def _parse_range(text: str) -> range:
+    lo, _, hi = text.partition("-")
+    lo_i = int(lo)
+    hi_i = int(hi) if hi else lo_i
+    if lo_i > hi_i:
+        raise ValueError(f"empty range: {text!r}")
+    return range(lo_i, hi_i + 1)
 
 
 if __name__ == "__main__":
-    # One-shot cache builder:
-    d = build_cache_0_200(size=64, overwrite=False)
-    print(f"Built/verified cache in: {d}")
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Build the icon cache or benchmark rendering.")
+    ap.add_argument("--bench", action="store_true", help="benchmark rendering and exit")
+    ap.add_argument("--sizes", type=int, nargs="+", default=[64], help="icon sizes in px (default: 64)")
+    ap.add_argument("--jobs", type=int, default=None, help="worker processes (default: all cores)")
+    ap.add_argument("--overwrite", action="store_true", help="re-render existing icons")
+    ap.add_argument("--range", type=_parse_range, default=range(0, 201), help="values, e.g. 0-200 or 180")
+    ap.add_argument("--repeat", type=int, default=20, help="iterations for --bench")
+    ap.add_argument("--renderer", choices=RENDERERS, default="pipeline")
+    a = ap.parse_args()
+
+    if a.bench:
+        for size in a.sizes:
+            res = bench_radial_gradient(size=size, repeat=a.repeat)
+            res.update(bench_ball_icon(size=size, repeat=a.repeat))
+            print(f"size {size}:")
+            for k, v in res.items():
+                print(f"{k:>18}: {v:.3f}")
+    else:
+        t_all = time.perf_counter()
+        for r in build_cache_parallel(a.sizes, a.range, jobs=a.jobs, overwrite=a.overwrite, renderer=a.renderer):
+            st = cache_stats(r.cache_dir)
+            print(
+                f"size {r.size:>4}: {r.written:>3} written in {r.seconds * 1000:8.1f} ms, "
+                f"{st['icons']} icons ({st['bytes']} B) -> {r.cache_dir}"
+            )
+        print(f"total: {(time.perf_counter() - t_all) * 1000:.1f} ms")